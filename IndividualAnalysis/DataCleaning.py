@@ -1,47 +1,27 @@
 import polars as pl
 import matplotlib.pyplot as plt
+import quality_report
 
-# Read the Parquet files from the directory using Dask
-df = pl.scan_parquet("../../../../../Downloads/archive/parquet/*.parquet").collect(streaming=True)
+# Scan the Parquet files lazily; nothing is loaded until a query runs
+df = pl.scan_parquet(quality_report.SOURCES)
 
-# Show the resulting DataFrame
-print(df)
+# Calculate trip duration in seconds and flag trips where it differs from trip_time by more than 1 second
+df = quality_report.with_duration_check(df)
 
-# Check for null values in specific columns
-null_base = df['base_passenger_fare'].is_null()
-null_tips = df['tips'].is_null()
-null_pay = df['driver_pay'].is_null()
-null_pickup = df['pickup_datetime'].is_null()
-null_dropoff = df['dropoff_datetime'].is_null()
+# Null counts, min/max, negatives, mean/std per column and the duration mismatch rate in one streaming pass
+report, totals = quality_report.profile(df)
+quality_report.print_report(report, totals)
 
-print(null_base.sum())
-print(null_tips.sum())
-print(null_pay.sum())
-print(null_pickup.sum())
-print(null_dropoff.sum())
-
-# Calculate trip duration in seconds
-df = df.with_columns(
-    ((pl.col('dropoff_datetime') - pl.col('pickup_datetime'))/ 1e9).cast(pl.Int64).alias('calc_duration')
-)
-
-# Create the 'duration_equals_trip_time' column, set to False if difference > 1 second, else True
-df = df.with_columns(
-    ((pl.col('calc_duration') - pl.col('trip_time')).abs() <= 1).alias('duration_equals_trip_time')
+# Reduce precision to save memory, every Float64 column cast in a single select
+df = df.select(
+    [pl.col(col).cast(pl.Float32) if dtype == pl.Float64 else pl.col(col) for col, dtype in df.collect_schema().items()]
 )
 
-# Reduce precision to save memory
-for col in df.columns:
-    if df[col].dtype == pl.Float64:
-        print(f"casting {col}")
-        df = df.with_columns(
-            pl.col(col).cast(pl.Float32)
-        )
-
+# A few of the mismatched trips rather than all of them
 df_filtered = df.filter(pl.col('duration_equals_trip_time') == False).select(['pickup_datetime', 'dropoff_datetime', 'trip_time', 'calc_duration'])
 
 # Display the result
-print(df_filtered)
+print(df_filtered.head(10).collect(engine="streaming"))
 
 df_filtered = df.drop(['trip_time'])
 '''
@@ -82,10 +62,9 @@ plt.show()
 print(df_filtered[['base_passenger_fare', 'tips', 'driver_pay']].describe())
 '''
 
-df_lazy = df.lazy()
-
 # Remove rows where base_passenger_fare or driver_pay are negative
 # First, apply a filter on base_passenger_fare
-df_filtered = df_lazy.filter(pl.col('base_passenger_fare') > 0).filter(pl.col('driver_pay') > 0)
+df_filtered = df.filter(pl.col('base_passenger_fare') > 0).filter(pl.col('driver_pay') > 0)
 
-print(df_filtered.select('base_passenger_fare', 'tips', 'driver_pay').collect().describe())
\ No newline at end of file
+# Summary of the pay columns, again one streaming pass
+quality_report.print_report(*quality_report.profile(df_filtered.select('base_passenger_fare', 'tips', 'driver_pay')))
@@ -1,25 +1,17 @@
 import polars as pl
 import matplotlib.pyplot as plt
+import outliers
+import materialize
+import compact
+import density_plots
+import trip_cube
+import od_matrix
 
-# Define function filter out outliers
-def filter_outliers(df, column_name):
-    # Calculate the mean and standard deviation of column age
-    mean = df.select(pl.col(column_name)).mean().collect()
-    mean_val = mean[0, column_name]
-    std = df.select(pl.col(column_name)).std().collect()
-    std_val = std[0, column_name]
-    print(mean_val)
-    print(std_val)
-
-    # Remove outliers through filtering
-    df_filtered = df.filter(
-        (pl.col(column_name) < mean_val + 3*std_val) & (pl.col(column_name) > mean_val - 3*std_val)
-    )
-    
-    return df_filtered
+# The compacted archive from compact.py when it has been written (already Float32 / UInt16 / Categorical)
+SOURCES = compact.sources()
 
 # Use lazy scan
-df_lazy = pl.scan_parquet("../../../../../Downloads/archive/parquet/*.parquet")
+df_lazy = pl.scan_parquet(SOURCES)
 
 # Apply filters
 df_lazy_filtered = df_lazy.filter(
@@ -41,15 +33,20 @@ df_lazy_filtered = df_lazy_filtered.select(
 # Select the relevant columns
 df_lazy_filtered = df_lazy_filtered.select(['driver_pay', 'tips', 'calc_duration', 'request_datetime', 'pickup_datetime', 'dropoff_datetime', 'trip_miles', 'PULocationID', 'DOLocationID'])
 
-# Filter outliers
-df_lazy_filtered = filter_outliers(df_lazy_filtered, 'tips')
-df_lazy_filtered = filter_outliers(df_lazy_filtered, 'driver_pay')
-df_lazy_filtered = filter_outliers(df_lazy_filtered, 'calc_duration')
+def remove_outliers(df):
+    # Filter outliers: mean and std of all three columns from the trip cube (only new or
+    # changed archive files are aggregated), then one three-sigma filter added to the lazy plan
+    trip_cube.update(SOURCES)
+    df = outliers.within_bounds(df, trip_cube.sigma_bounds(trip_cube.load(), ['tips', 'driver_pay', 'calc_duration']))
 
-# Apply filters
-df_lazy_filtered = df_lazy_filtered.filter(
-    pl.col('calc_duration') > 0
-)
+    # Apply filters
+    return df.filter(
+        pl.col('calc_duration') > 0
+    )
+
+# Clean once and keep the result on disk; later runs memory-map it as long as the
+# source files, the plan and the code of remove_outliers are unchanged (delete cache/ to force a rebuild)
+df_lazy_filtered = materialize.cached("rideshare_clean", SOURCES, df_lazy_filtered, remove_outliers)
 
 # extract date components
 df_time = df_lazy_filtered.with_columns(
@@ -79,9 +76,6 @@ df_stats = df_stats.with_columns(
 
 print(df_stats.collect())
 
-# Convert from LazyFrame to DataFrame for plotting
-df_plotting_df = df_lazy_filtered.collect()
-
 # Plot histograms for distribution of base pay and tips
 plt.figure(figsize=(12,6))
 '''
@@ -102,13 +96,9 @@ plt.ylabel('Frequency')
 plt.tight_layout()
 plt.show()
 '''
-# Boxplot for base pay vs. tips
-plt.figure(figsize=(8, 6))
-plt.boxplot([df_plotting_df['driver_pay'], df_plotting_df['tips']], tick_labels=['Base Pay', 'Tips'])
-plt.title('Boxplot of Base Fares vs. Tips')
-plt.xlabel('Type')
-plt.ylabel('Amount')
-plt.show()
+# Boxplot for base pay vs. tips, from quartiles and whiskers computed by Polars
+box_stats = density_plots.box_stats(df_lazy_filtered, ['driver_pay', 'tips'], labels=['Base Pay', 'Tips'])
+density_plots.plot_boxes(box_stats, 'Boxplot of Base Fares vs. Tips', 'Type', 'Amount')
 
 # extract date components
 df_time = df_lazy_filtered.with_columns(
@@ -154,26 +144,20 @@ plt.ylabel('Average Tip')
 plt.tight_layout()
 plt.show()
 
-plt.figure(figsize=(8, 6))
-plt.scatter(df_plotting_df['calc_duration'], df_plotting_df['tips'], alpha=0.5, color='red')
-plt.title('Relationship Between Trip Duration and Tips')
-plt.xlabel('Trip Duration (seconds)')
-plt.ylabel('Tips')
-plt.tight_layout()
-plt.show()
+# Trip counts on a 2D grid instead of one marker per trip
+grid, x_edges, y_edges = density_plots.histogram2d(df_lazy_filtered, 'calc_duration', 'tips')
+density_plots.plot_density(grid, x_edges, y_edges, 'Relationship Between Trip Duration and Tips', 'Trip Duration (seconds)', 'Tips')
 
-plt.figure(figsize=(8, 6))
-plt.scatter(df_plotting_df['trip_miles'], df_plotting_df['tips'], alpha=0.5, color='red')
-plt.title('Relationship Between Trip Miles and Tips')
-plt.xlabel('Trip Miles')
-plt.ylabel('Tips')
-plt.tight_layout()
-plt.show()
+grid, x_edges, y_edges = density_plots.histogram2d(df_lazy_filtered, 'trip_miles', 'tips')
+density_plots.plot_density(grid, x_edges, y_edges, 'Relationship Between Trip Miles and Tips', 'Trip Miles', 'Tips')
 
-plt.figure(figsize=(8,6))
-plt.scatter(df_plotting_df['driver_pay'],df_plotting_df['tips'], alpha=0.5, color='red')
-plt.title('Relationship between Base Pay and Tips')
-plt.xlabel('Base Pay')
-plt.ylabel('Tips')
-plt.tight_layout()
-plt.show()
\ No newline at end of file
+grid, x_edges, y_edges = density_plots.histogram2d(df_lazy_filtered, 'driver_pay', 'tips')
+density_plots.plot_density(grid, x_edges, y_edges, 'Relationship between Base Pay and Tips', 'Base Pay', 'Tips')
+
+# Zone-level earnings from the origin-destination matrices (build them with: python3 od_matrix.py)
+if od_matrix.exists():
+    od = od_matrix.load()
+    print(od_matrix.top_corridors(od))
+    print(od_matrix.zone_tip_rates(od).sort('tip_proportion', descending=True).head(10))
+    od_matrix.plot_heatmap(od['trips'], 'Trips per Pickup and Dropoff Zone', 'Number of Trips')
+    od_matrix.plot_heatmap(od['tips'] / od['trips'].clip(min=1), 'Average Tip per Pickup and Dropoff Zone', 'Average Tip')
@@ -0,0 +1,192 @@
+import os
+import sys
+import glob
+import json
+import time
+import polars as pl
+
+# One-time rewrite of the rideshare archive with the narrowest safe column types, so later
+# scans read a fraction of the bytes and nothing has to be downcast at query time:
+#   integers   smallest signed/unsigned type that holds the column's min and max
+#              (PULocationID/DOLocationID -> UInt16, trip_time -> UInt32, ...)
+#   floats     Float32 when no value moves by more than FLOAT32_TOLERANCE (half a cent)
+#   strings    Categorical (dictionary encoded) when there are few distinct values
+#              (license numbers, base numbers, Y/N flags)
+# The ranges come from one streaming pass over the archive, then every file is rewritten
+# on its own with the same schema, zstd and larger row groups. Later runs only touch files
+# that are new or changed (see rewrite()).
+ARCHIVE_SOURCES = "../../../../../Downloads/archive/parquet/*.parquet"
+COMPACT_DIR = "../../../../../Downloads/archive/compact"
+
+FLOAT32_TOLERANCE = 0.005
+DICTIONARY_MAX = 10_000
+ROW_GROUP_SIZE = 1_000_000
+COMPRESSION_LEVEL = 6
+STATS_FILE = "column_stats.json"
+
+INTEGER_TYPES = [
+    (pl.UInt8, 0, 2**8 - 1), (pl.Int8, -2**7, 2**7 - 1),
+    (pl.UInt16, 0, 2**16 - 1), (pl.Int16, -2**15, 2**15 - 1),
+    (pl.UInt32, 0, 2**32 - 1), (pl.Int32, -2**31, 2**31 - 1),
+]
+
+
+# Archive files with no compacted copy, or one older than the file itself
+def stale(archive_sources=ARCHIVE_SOURCES, compact_dir=COMPACT_DIR):
+    paths = []
+    for path in sorted(glob.glob(archive_sources)):
+        compacted = os.path.join(compact_dir, os.path.basename(path))
+        if not os.path.exists(compacted) or os.path.getmtime(compacted) < os.path.getmtime(path):
+            paths.append(path)
+    return paths
+
+
+# The archive file a compacted file was made from (the path itself when it is not one)
+def origin(path, archive_sources=ARCHIVE_SOURCES):
+    archived = os.path.join(os.path.dirname(archive_sources), os.path.basename(path))
+    return archived if os.path.exists(archived) else path
+
+
+# Compacted files whose archive file is gone
+def orphaned(archive_sources=ARCHIVE_SOURCES, compact_dir=COMPACT_DIR):
+    archived = {os.path.basename(path) for path in glob.glob(archive_sources)}
+    if not archived:
+        return []
+    return [path for path in sorted(glob.glob(os.path.join(compact_dir, "*.parquet")))
+            if os.path.basename(path) not in archived]
+
+
+# The compacted files when they have been written and match the whole archive, otherwise
+# the original archive (with a warning, so a new month is never silently left out)
+def sources(compact_dir=COMPACT_DIR, archive_sources=ARCHIVE_SOURCES):
+    if not glob.glob(os.path.join(compact_dir, "*.parquet")):
+        return archive_sources
+    missing = stale(archive_sources, compact_dir) + orphaned(archive_sources, compact_dir)
+    if missing:
+        names = ", ".join(os.path.basename(path) for path in missing)
+        print(f"Warning: {compact_dir} is behind the archive ({names}); reading the original files, "
+              f"run compact.py to bring it up to date", file=sys.stderr)
+        return archive_sources
+    return os.path.join(compact_dir, "*.parquet")
+
+
+def smallest_integer(low, high):
+    for dtype, type_low, type_high in INTEGER_TYPES:
+        if low >= type_low and high <= type_high:
+            return dtype
+    return pl.Int64
+
+
+# Per-column min/max (integers), Float32 rounding loss (floats) and distinct count (strings)
+def column_stats(df):
+    schema = df.collect_schema()
+    exprs = []
+    for column, dtype in schema.items():
+        if dtype.is_integer():
+            exprs += [pl.col(column).min().alias(f"{column}|min"), pl.col(column).max().alias(f"{column}|max")]
+        elif dtype == pl.Float64:
+            exprs.append(
+                (pl.col(column) - pl.col(column).cast(pl.Float32).cast(pl.Float64)).abs().max().alias(f"{column}|loss"))
+        elif dtype == pl.String:
+            exprs.append(pl.col(column).n_unique().alias(f"{column}|distinct"))
+    return df.select(exprs).collect(engine="streaming").row(0, named=True)
+
+
+# Stats of two sets of files together. Distinct counts take the larger one: a string column
+# keeps the type chosen on the first run unless a single new batch alone exceeds the limit
+def merge_stats(a, b):
+    merged = {}
+    for key in a.keys() | b.keys():
+        values = [value for value in (a.get(key), b.get(key)) if value is not None]
+        if not values:
+            merged[key] = None
+        elif key.endswith("|min"):
+            merged[key] = min(values)
+        else:
+            merged[key] = max(values)
+    return merged
+
+
+# {column: narrowest safe type} for every column that can shrink
+def narrow_schema(schema, stats):
+    narrowed = {}
+    for column, dtype in schema.items():
+        if dtype.is_integer() and stats.get(f"{column}|min") is not None:
+            narrowed[column] = smallest_integer(stats[f"{column}|min"], stats[f"{column}|max"])
+        elif dtype == pl.Float64 and (stats.get(f"{column}|loss") or 0) <= FLOAT32_TOLERANCE:
+            narrowed[column] = pl.Float32
+        elif dtype == pl.String and (stats.get(f"{column}|distinct") or 0) <= DICTIONARY_MAX:
+            narrowed[column] = pl.Categorical
+    return {column: dtype for column, dtype in narrowed.items() if dtype != schema[column]}
+
+
+# Compact the archive files that are new or changed since the last run; the stats behind the
+# chosen types are kept in compact/column_stats.json, so only those files are scanned and
+# rewritten and every other compacted file keeps its mtime (and its trip_cube partial).
+# When a new file needs a wider type than the saved schema, every file is rewritten.
+# Returns the names that were rewritten
+def rewrite(archive_sources=ARCHIVE_SOURCES, compact_dir=COMPACT_DIR):
+    paths = sorted(glob.glob(archive_sources))
+    stats_path = os.path.join(compact_dir, STATS_FILE)
+    os.makedirs(compact_dir, exist_ok=True)
+
+    for path in orphaned(archive_sources, compact_dir):
+        print(f"Removing {os.path.basename(path)}")
+        os.remove(path)
+
+    pending = stale(archive_sources, compact_dir)
+    if not pending:
+        print("Compacted archive is up to date")
+        return []
+
+    schema = pl.scan_parquet(paths).collect_schema()
+    if os.path.exists(stats_path):
+        with open(stats_path) as f:
+            saved = json.load(f)
+        print(f"Checking column types against {len(pending)} new or changed files")
+        stats = merge_stats(saved, column_stats(pl.scan_parquet(pending)))
+        if narrow_schema(schema, stats) != narrow_schema(schema, saved):
+            print("New files need wider types, rewriting the whole archive")
+            pending = paths
+    else:
+        print("Choosing column types")
+        stats = column_stats(pl.scan_parquet(paths))
+        pending = paths
+
+    narrowed = narrow_schema(schema, stats)
+    for column, dtype in narrowed.items():
+        print(f"  {column}: {dtype}")
+
+    for path in pending:
+        print(f"Rewriting {os.path.basename(path)}")
+        target = os.path.join(compact_dir, os.path.basename(path))
+        (
+            pl.scan_parquet(path)
+            .with_columns([pl.col(column).cast(dtype) for column, dtype in narrowed.items()])
+            .sink_parquet(target + ".tmp", compression="zstd",
+                          compression_level=COMPRESSION_LEVEL, statistics=True, row_group_size=ROW_GROUP_SIZE)
+        )
+        os.replace(target + ".tmp", target)
+
+    with open(stats_path, "w") as f:
+        json.dump(stats, f)
+    return [os.path.basename(path) for path in pending]
+
+
+def total_bytes(pattern):
+    return sum(os.path.getsize(path) for path in glob.glob(pattern))
+
+
+if __name__ == "__main__":
+    archive_sources = sys.argv[1] if len(sys.argv) > 1 else ARCHIVE_SOURCES
+    compact_dir = sys.argv[2] if len(sys.argv) > 2 else COMPACT_DIR
+
+    start_time = time.perf_counter_ns()
+    rewritten = rewrite(archive_sources, compact_dir)
+    end_time = time.perf_counter_ns()
+
+    before = total_bytes(archive_sources)
+    after = total_bytes(os.path.join(compact_dir, "*.parquet"))
+    print(f"Rewrote {len(rewritten)} files")
+    print(f"{before / 1e6:.1f} MB -> {after / 1e6:.1f} MB")
+    print(f"Execution time: {(end_time - start_time) / 1_000_000:.3f} ms")
@@ -0,0 +1,90 @@
+import numpy as np
+import polars as pl
+import matplotlib.pyplot as plt
+from matplotlib.colors import LogNorm
+
+# Plots for frames too big to hand to matplotlib row by row. The binning and the box
+# statistics run as Polars queries, and matplotlib only receives a bins x bins grid or a
+# handful of numbers per box, whatever the row count.
+BINS = 200
+
+
+# Counts on a bins x bins grid over [x_range] x [y_range] (defaults to each column's min/max),
+# as a NumPy array indexed [y bin, x bin] plus the bin edges
+def histogram2d(df, x, y, bins=BINS, x_range=None, y_range=None):
+    if x_range is None or y_range is None:
+        bounds = df.select(
+            pl.col(x).min().alias("x_min"), pl.col(x).max().alias("x_max"),
+            pl.col(y).min().alias("y_min"), pl.col(y).max().alias("y_max"),
+        ).collect(engine="streaming").row(0, named=True)
+        x_range = x_range or (bounds["x_min"], bounds["x_max"])
+        y_range = y_range or (bounds["y_min"], bounds["y_max"])
+
+    def bin_index(column, low, high):
+        width = (high - low) / bins if high > low else 1
+        return ((pl.col(column).cast(pl.Float64) - low) / width).floor().clip(0, bins - 1).cast(pl.Int32)
+
+    counts = (
+        df.filter(pl.col(x).is_between(*x_range) & pl.col(y).is_between(*y_range))
+        .group_by(bin_index(x, *x_range).alias("x_bin"), bin_index(y, *y_range).alias("y_bin"))
+        .agg(pl.len().alias("count"))
+        .collect(engine="streaming")
+    )
+    grid = np.zeros((bins, bins), dtype=np.int64)
+    grid[counts["y_bin"].to_numpy(), counts["x_bin"].to_numpy()] = counts["count"].to_numpy()
+    return grid, np.linspace(*x_range, bins + 1), np.linspace(*y_range, bins + 1)
+
+
+def plot_density(grid, x_edges, y_edges, title, xlabel, ylabel):
+    plt.figure(figsize=(8, 6))
+    mesh = plt.pcolormesh(x_edges, y_edges, np.where(grid > 0, grid, np.nan), cmap='viridis',
+                          norm=LogNorm(vmin=1, vmax=max(int(grid.max()), 1)))
+    plt.colorbar(mesh, label='Number of Trips')
+    plt.title(title)
+    plt.xlabel(xlabel)
+    plt.ylabel(ylabel)
+    plt.tight_layout()
+    plt.show()
+
+
+# Box statistics in the form plt.bxp takes: quartiles (linear interpolation, as in
+# matplotlib.cbook.boxplot_stats) from one query, then the whiskers
+# (most extreme values inside 1.5 IQR) from a second one
+def box_stats(df, columns, labels=None):
+    quartiles = df.select(
+        [pl.col(column).quantile(q, interpolation="linear").alias(f"{column}|{q}")
+         for column in columns for q in (0.25, 0.5, 0.75)]
+        + [pl.col(column).mean().alias(f"{column}|mean") for column in columns]
+    ).collect(engine="streaming").row(0, named=True)
+
+    fences = {}
+    for column in columns:
+        q1, q3 = quartiles[f"{column}|0.25"], quartiles[f"{column}|0.75"]
+        fences[column] = (q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1))
+    whiskers = df.select(
+        [pl.col(column).filter(pl.col(column) >= fences[column][0]).min().alias(f"{column}|low") for column in columns]
+        + [pl.col(column).filter(pl.col(column) <= fences[column][1]).max().alias(f"{column}|high") for column in columns]
+    ).collect(engine="streaming").row(0, named=True)
+
+    return [
+        {
+            "label": label,
+            "q1": quartiles[f"{column}|0.25"],
+            "med": quartiles[f"{column}|0.5"],
+            "q3": quartiles[f"{column}|0.75"],
+            "mean": quartiles[f"{column}|mean"],
+            "whislo": whiskers[f"{column}|low"],
+            "whishi": whiskers[f"{column}|high"],
+            "fliers": [],
+        }
+        for column, label in zip(columns, labels or columns)
+    ]
+
+
+def plot_boxes(stats, title, xlabel, ylabel):
+    plt.figure(figsize=(8, 6))
+    plt.gca().bxp(stats, showfliers=False)
+    plt.title(title)
+    plt.xlabel(xlabel)
+    plt.ylabel(ylabel)
+    plt.show()
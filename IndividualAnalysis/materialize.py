@@ -0,0 +1,64 @@
+import os
+import glob
+import types
+import hashlib
+import inspect
+import polars as pl
+
+# Cache for an expensive lazy result. The key is a fingerprint of the source files
+# (path, size, modification time) plus the query plan and the source code of finish(), of
+# the modules and functions it calls and the values of the globals it reads, so editing
+# the cleaning code or touching the data makes a new entry.
+# Entries are uncompressed Arrow IPC files, which scan_ipc memory-maps instead of reading.
+CACHE_DIR = 'cache'
+
+
+# Source of finish() plus whatever it reaches through its globals: whole modules (so a
+# change to e.g. outliers.within_bounds counts), functions, and the repr of plain values
+def code_fingerprint(finish):
+    parts = [inspect.getsource(finish)]
+    for name in sorted(set(finish.__code__.co_names)):
+        if name not in finish.__globals__:
+            continue
+        value = finish.__globals__[name]
+        if isinstance(value, (types.ModuleType, types.FunctionType)):
+            try:
+                parts.append(inspect.getsource(value))
+            except (OSError, TypeError):
+                # Built-in or installed without sources; its version stands in for the code
+                parts.append(f"{name} {getattr(value, '__version__', '')}")
+        elif not isinstance(value, (type, pl.LazyFrame, pl.DataFrame)):
+            parts.append(f"{name}={value!r}")
+    return "\n".join(parts)
+
+
+def fingerprint(sources, plan, finish=None):
+    digest = hashlib.sha256()
+    for path in sorted(glob.glob(sources)):
+        stat = os.stat(path)
+        digest.update(f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}\n".encode())
+    digest.update(plan.explain(optimized=False).encode())
+    if finish is not None:
+        digest.update(code_fingerprint(finish).encode())
+    return digest.hexdigest()[:16]
+
+
+# The cleaned frame as a memory-mapped LazyFrame; finish(plan) runs only on a cache miss,
+# so work like computing outlier bounds is skipped too when the entry already exists
+def cached(name, sources, plan, finish=None, cache_dir=CACHE_DIR):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"{name}-{fingerprint(sources, plan, finish)}.arrow")
+
+    if not os.path.exists(path):
+        print(f"Materializing {name}")
+        result = finish(plan) if finish is not None else plan
+        result.sink_ipc(path + ".tmp", compression=None)
+        os.replace(path + ".tmp", path)
+        # Older entries for the same name can never be hit again
+        for old_path in glob.glob(os.path.join(cache_dir, f"{name}-*.arrow")):
+            if old_path != path:
+                os.remove(old_path)
+    else:
+        print(f"Reading cached {name}")
+
+    return pl.scan_ipc(path, memory_map=True)
@@ -0,0 +1,118 @@
+import os
+import sys
+import glob
+import time
+import multiprocessing
+import numpy as np
+import polars as pl
+import matplotlib.pyplot as plt
+from matplotlib.colors import LogNorm
+import compact
+import trip_cube
+
+# Origin-destination matrices indexed [PULocationID, DOLocationID] (taxi zones 1..265, row
+# and column 0 stay empty): trips plus summed tips, driver_pay and trip_miles per zone pair.
+# Every archive file is streamed into its own dense partial in a worker process, and the
+# partials are added together at the end, so the whole build is one parallel pass.
+# Trips are the ones analysis.py keeps before removing outliers (base fare and pay above 0).
+OD_PATH = 'od_matrices.npz'
+
+ZONES = 266
+MEASURES = ["trips", "tips", "driver_pay", "trip_miles"]
+BATCH_SIZE = 1_000_000
+
+
+def file_matrices(path):
+    matrices = np.zeros((len(MEASURES), ZONES * ZONES), dtype=np.float64)
+    trips = (
+        trip_cube.base_trips(pl.scan_parquet(path))
+        .filter(pl.col('PULocationID').is_between(0, ZONES - 1) & pl.col('DOLocationID').is_between(0, ZONES - 1))
+        .select(
+            (pl.col('PULocationID').cast(pl.Int64) * ZONES + pl.col('DOLocationID').cast(pl.Int64)).alias("pair"),
+            pl.col('tips').cast(pl.Float64).fill_null(0),
+            pl.col('driver_pay').cast(pl.Float64).fill_null(0),
+            pl.col('trip_miles').cast(pl.Float64).fill_null(0),
+        )
+    )
+    for batch in trips.collect_batches(chunk_size=BATCH_SIZE):
+        pair = batch["pair"].to_numpy()
+        matrices[0] += np.bincount(pair, minlength=ZONES * ZONES)
+        for i, measure in enumerate(MEASURES[1:], start=1):
+            matrices[i] += np.bincount(pair, weights=batch[measure].to_numpy(), minlength=ZONES * ZONES)
+    return matrices
+
+
+def build(sources=None, od_path=OD_PATH, workers=None):
+    sources = sources or compact.sources()
+    paths = sorted(glob.glob(sources))
+    totals = np.zeros((len(MEASURES), ZONES * ZONES), dtype=np.float64)
+
+    # Spawned workers, since forking a process that already runs Polars threads can deadlock
+    with multiprocessing.get_context("spawn").Pool(workers or min(len(paths), os.cpu_count()) or 1) as pool:
+        for path, matrices in zip(paths, pool.imap(file_matrices, paths)):
+            print(f"Added {os.path.basename(path)}")
+            totals += matrices
+
+    np.savez(od_path, **{measure: totals[i].reshape(ZONES, ZONES) for i, measure in enumerate(MEASURES)})
+
+
+def exists(od_path=OD_PATH):
+    return os.path.exists(od_path)
+
+
+def load(od_path=OD_PATH):
+    with np.load(od_path) as od:
+        return {measure: od[measure] for measure in MEASURES}
+
+
+# Trips, average tip and the share of earnings from tips per pickup (axis=1) or dropoff (axis=0) zone
+def zone_tip_rates(od, axis=1):
+    trips = od["trips"].sum(axis=axis)
+    tips = od["tips"].sum(axis=axis)
+    pay = od["driver_pay"].sum(axis=axis)
+    zones = np.flatnonzero(trips > 0)
+    return pl.DataFrame({
+        "zone": zones,
+        "trips": trips[zones].astype(np.int64),
+        "avg_tip": tips[zones] / trips[zones],
+        "tip_proportion": tips[zones] / (tips[zones] + pay[zones]),
+    })
+
+
+# The k zone pairs with the most trips, with their average tip, pay and miles
+def top_corridors(od, k=10):
+    flat = od["trips"].ravel()
+    top = np.argpartition(flat, -k)[-k:]
+    top = top[np.argsort(-flat[top], kind="stable")]
+    trips = flat[top]
+    return pl.DataFrame({
+        "PULocationID": top // ZONES,
+        "DOLocationID": top % ZONES,
+        "trips": trips.astype(np.int64),
+        "avg_tip": od["tips"].ravel()[top] / trips,
+        "avg_pay": od["driver_pay"].ravel()[top] / trips,
+        "avg_miles": od["trip_miles"].ravel()[top] / trips,
+    })
+
+
+def plot_heatmap(matrix, title, label):
+    plt.figure(figsize=(10, 8))
+    heatmap = plt.imshow(np.where(matrix > 0, matrix, np.nan), cmap='viridis', norm=LogNorm())
+    plt.colorbar(heatmap, label=label)
+    plt.title(title)
+    plt.xlabel('Dropoff Zone')
+    plt.ylabel('Pickup Zone')
+    plt.tight_layout()
+    plt.show()
+
+
+if __name__ == "__main__":
+    sources = sys.argv[1] if len(sys.argv) > 1 else compact.sources()
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    start_time = time.perf_counter_ns()
+    build(sources, workers=workers)
+    end_time = time.perf_counter_ns()
+
+    print(top_corridors(load()))
+    print(f"Execution time: {(end_time - start_time) / 1_000_000:.3f} ms")
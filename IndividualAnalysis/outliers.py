@@ -0,0 +1,78 @@
+import numpy as np
+import polars as pl
+
+# Outlier bounds for many columns from one streaming pass over a lazy plan.
+# Every batch is reduced to (count, mean, M2) per column, M2 being the sum of squared
+# deviations from the mean, and the partial results are merged with the parallel
+# form of Welford's update, so the whole dataset is never held in memory.
+BATCH_SIZE = 1_000_000
+
+
+def batch_moments(batch, columns):
+    stats = batch.select(
+        [pl.col(column).count().alias(f"{column}_count") for column in columns]
+        + [pl.col(column).mean().alias(f"{column}_mean") for column in columns]
+        + [pl.col(column).var(ddof=0).alias(f"{column}_var") for column in columns]
+    ).row(0)
+    count = np.array(stats[:len(columns)], dtype=np.float64)
+    mean = np.nan_to_num(np.array(stats[len(columns):2 * len(columns)], dtype=np.float64))
+    m2 = np.nan_to_num(np.array(stats[2 * len(columns):], dtype=np.float64)) * count
+    return count, mean, m2
+
+
+# Combine two (count, mean, M2) partials, column by column
+def merge_moments(a, b):
+    count_a, mean_a, m2_a = a
+    count_b, mean_b, m2_b = b
+    count = count_a + count_b
+    safe_count = np.where(count > 0, count, 1)
+    delta = mean_b - mean_a
+    mean = mean_a + delta * count_b / safe_count
+    m2 = m2_a + m2_b + delta ** 2 * count_a * count_b / safe_count
+    return count, mean, m2
+
+
+# {column: (mean, std)} in one pass; std uses ddof=1 like polars' std()
+def column_moments(df, columns, batch_size=BATCH_SIZE):
+    zeros = np.zeros(len(columns))
+    moments = (zeros, zeros, zeros)
+    for batch in df.select(columns).collect_batches(chunk_size=batch_size):
+        if batch.height > 0:
+            moments = merge_moments(moments, batch_moments(batch, columns))
+    count, mean, m2 = moments
+    std = np.sqrt(m2 / np.where(count > 1, count - 1, np.nan))
+    return {column: (float(mean[i]), float(std[i])) for i, column in enumerate(columns)}
+
+
+# {column: (low, high)} at mean +- sigmas * std
+def sigma_bounds(df, columns, sigmas=3, batch_size=BATCH_SIZE):
+    bounds = {}
+    for column, (mean, std) in column_moments(df, columns, batch_size).items():
+        print(f"{column}: mean {mean}, std {std}")
+        bounds[column] = (mean - sigmas * std, mean + sigmas * std)
+    return bounds
+
+
+# {column: (low, high)} at Q1 - k * IQR and Q3 + k * IQR, all quantiles in one query
+def iqr_bounds(df, columns, k=1.5):
+    quantiles = df.select(
+        [pl.col(column).quantile(0.25).alias(f"{column}_q1") for column in columns]
+        + [pl.col(column).quantile(0.75).alias(f"{column}_q3") for column in columns]
+    ).collect(engine="streaming").row(0, named=True)
+    bounds = {}
+    for column in columns:
+        q1 = quantiles[f"{column}_q1"]
+        q3 = quantiles[f"{column}_q3"]
+        bounds[column] = (q1 - k * (q3 - q1), q3 + k * (q3 - q1))
+    return bounds
+
+
+# Keep the rows strictly inside every column's bounds, as one filter in the same lazy plan
+def within_bounds(df, bounds):
+    return df.filter(pl.all_horizontal([
+        (pl.col(column) > low) & (pl.col(column) < high) for column, (low, high) in bounds.items()
+    ]))
+
+
+def filter_outliers(df, columns, sigmas=3, batch_size=BATCH_SIZE):
+    return within_bounds(df, sigma_bounds(df, columns, sigmas, batch_size))
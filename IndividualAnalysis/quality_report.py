@@ -0,0 +1,76 @@
+import sys
+import time
+import polars as pl
+import compact
+
+# Data-quality report for the rideshare archive from one streaming pass: every statistic
+# below is a reduction, so the streaming engine keeps only running totals in memory.
+# One row per column (nulls, min, max, negatives, mean, std) plus the rate of trips whose
+# pickup/dropoff duration disagrees with trip_time by more than a second.
+
+# The compacted archive from compact.py when it has been written
+SOURCES = compact.sources()
+
+
+def with_duration_check(df):
+    return df.with_columns(
+        ((pl.col('dropoff_datetime') - pl.col('pickup_datetime')) / 1e9).cast(pl.Int64).alias('calc_duration')
+    ).with_columns(
+        ((pl.col('calc_duration') - pl.col('trip_time')).abs() <= 1).alias('duration_equals_trip_time')
+    )
+
+
+# (per-column report, totals) for a LazyFrame
+def profile(df):
+    schema = df.collect_schema()
+    exprs = [pl.len().alias("rows")]
+    for column, dtype in schema.items():
+        exprs += [
+            pl.col(column).null_count().alias(f"{column}|nulls"),
+            pl.col(column).min().cast(pl.String).alias(f"{column}|min"),
+            pl.col(column).max().cast(pl.String).alias(f"{column}|max"),
+        ]
+        if dtype.is_numeric():
+            exprs += [
+                (pl.col(column) < 0).sum().alias(f"{column}|negatives"),
+                pl.col(column).mean().alias(f"{column}|mean"),
+                pl.col(column).std().alias(f"{column}|std"),
+            ]
+    if "duration_equals_trip_time" in schema:
+        exprs.append((~pl.col("duration_equals_trip_time")).sum().alias("duration_mismatches"))
+
+    stats = df.select(exprs).collect(engine="streaming").row(0, named=True)
+
+    report = pl.DataFrame(
+        [
+            (column, str(dtype), stats[f"{column}|nulls"], stats[f"{column}|min"], stats[f"{column}|max"],
+             stats.get(f"{column}|negatives"), stats.get(f"{column}|mean"), stats.get(f"{column}|std"))
+            for column, dtype in schema.items()
+        ],
+        schema={"column": pl.String, "dtype": pl.String, "nulls": pl.UInt64, "min": pl.String, "max": pl.String,
+                "negatives": pl.UInt64, "mean": pl.Float64, "std": pl.Float64},
+        orient="row",
+    )
+    totals = {"rows": stats["rows"]}
+    if "duration_mismatches" in stats:
+        totals["duration_mismatches"] = stats["duration_mismatches"]
+        totals["duration_mismatch_rate"] = stats["duration_mismatches"] / stats["rows"] if stats["rows"] else 0.0
+    return report, totals
+
+
+def print_report(report, totals):
+    with pl.Config(tbl_rows=-1, tbl_cols=-1, tbl_width_chars=200):
+        print(report)
+    for name, value in totals.items():
+        print(f"{name}: {value}")
+
+
+if __name__ == "__main__":
+    sources = sys.argv[1] if len(sys.argv) > 1 else SOURCES
+
+    start_time = time.perf_counter_ns()
+    report, totals = profile(with_duration_check(pl.scan_parquet(sources)))
+    end_time = time.perf_counter_ns()
+
+    print_report(report, totals)
+    print(f"Execution time: {(end_time - start_time) / 1_000_000:.3f} ms")
@@ -0,0 +1,151 @@
+import os
+import sys
+import glob
+import time
+import polars as pl
+import compact
+
+# Aggregate cube of the rideshare trips keyed by (year, month, hour, PULocationID, DOLocationID),
+# holding the number of trips and, per measure, the non-null count, sum and sum of squares.
+# Means, variances, sigma bounds and tip proportions for any grouping of the keys are sums
+# over the cube instead of a scan of the archive. Each source file has its own partial cube
+# under cube/parts, and manifest.parquet records the size and mtime of the archive file it
+# was built from (the original, also when reading its compacted copy, so recompacting or
+# falling back to the originals does not count as a change), so update() only aggregates
+# files that are new or changed and drops the ones that are gone.
+# Trips are the ones analysis.py keeps before removing outliers (base fare and pay above 0).
+CUBE_DIR = 'cube'
+
+KEYS = ["year", "month", "hour", "PULocationID", "DOLocationID"]
+MEASURES = ["tips", "driver_pay", "base_passenger_fare", "trip_miles", "calc_duration"]
+
+MANIFEST_SCHEMA = {"source": pl.String, "size": pl.Int64, "mtime_ns": pl.Int64, "part": pl.String}
+
+
+def base_trips(df):
+    return df.filter(
+        (pl.col('base_passenger_fare') > 0) & (pl.col('driver_pay') > 0)
+    ).with_columns(
+        ((pl.col('dropoff_datetime') - pl.col('pickup_datetime')) / 1e9).cast(pl.Int64).alias('calc_duration')
+    )
+
+
+def file_partial(path):
+    measures = [pl.col(measure).cast(pl.Float64) for measure in MEASURES]
+    return (
+        base_trips(pl.scan_parquet(path))
+        .group_by(
+            pl.col('pickup_datetime').dt.year().cast(pl.Int16).alias("year"),
+            pl.col('pickup_datetime').dt.month().cast(pl.Int8).alias("month"),
+            pl.col('pickup_datetime').dt.hour().cast(pl.Int8).alias("hour"),
+            pl.col('PULocationID').cast(pl.Int16),
+            pl.col('DOLocationID').cast(pl.Int16),
+        )
+        .agg(
+            [pl.len().cast(pl.Int64).alias("trips")]
+            + [value.count().cast(pl.Int64).alias(f"{value.meta.output_name()}_count") for value in measures]
+            + [value.sum().alias(f"{value.meta.output_name()}_sum") for value in measures]
+            + [(value ** 2).sum().alias(f"{value.meta.output_name()}_sumsq") for value in measures]
+        )
+        .collect(engine="streaming")
+    )
+
+
+# Bring the cube up to date with the source files; returns the names that were (re)aggregated
+def update(sources=None, cube_dir=CUBE_DIR):
+    sources = sources or compact.sources()
+    parts_dir = os.path.join(cube_dir, "parts")
+    os.makedirs(parts_dir, exist_ok=True)
+    manifest_path = os.path.join(cube_dir, "manifest.parquet")
+    manifest = pl.read_parquet(manifest_path) if os.path.exists(manifest_path) else pl.DataFrame(schema=MANIFEST_SCHEMA)
+    built = {row["source"]: row for row in manifest.iter_rows(named=True)}
+
+    entries = []
+    changed = []
+    for path in sorted(glob.glob(sources)):
+        source = os.path.abspath(compact.origin(path))
+        stat = os.stat(source)
+        entry = built.get(source)
+        if entry is None or entry["size"] != stat.st_size or entry["mtime_ns"] != stat.st_mtime_ns \
+                or not os.path.exists(os.path.join(parts_dir, entry["part"])):
+            print(f"Aggregating {os.path.basename(path)}")
+            part = os.path.basename(path)
+            file_partial(path).write_parquet(os.path.join(parts_dir, part))
+            entry = {"source": source, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "part": part}
+            changed.append(os.path.basename(path))
+        entries.append(entry)
+
+    # Partials of files that left the archive
+    kept = {entry["part"] for entry in entries}
+    for part in os.listdir(parts_dir):
+        if part not in kept:
+            os.remove(os.path.join(parts_dir, part))
+
+    pl.DataFrame(entries, schema=MANIFEST_SCHEMA).write_parquet(manifest_path)
+    return changed
+
+
+def exists(cube_dir=CUBE_DIR):
+    return os.path.exists(os.path.join(cube_dir, "manifest.parquet"))
+
+
+def load(cube_dir=CUBE_DIR):
+    return pl.scan_parquet(os.path.join(cube_dir, "parts", "*.parquet"))
+
+
+# Trips, mean and std of every measure per group of keys (by=[] for the whole archive)
+def summarize(cube, by=(), measures=MEASURES):
+    sums = [pl.col("trips").sum()]
+    for measure in measures:
+        sums += [pl.col(f"{measure}_count").sum(), pl.col(f"{measure}_sum").sum(), pl.col(f"{measure}_sumsq").sum()]
+    grouped = cube.group_by(list(by)).agg(sums) if by else cube.select(sums)
+
+    stats = []
+    for measure in measures:
+        n = pl.col(f"{measure}_count")
+        mean = pl.col(f"{measure}_sum") / n
+        stats += [
+            mean.alias(f"{measure}_mean"),
+            ((pl.col(f"{measure}_sumsq") - n * mean ** 2) / (n - 1)).clip(lower_bound=0).sqrt().alias(f"{measure}_std"),
+        ]
+    result = grouped.select(list(by) + ["trips"] + stats)
+    return (result.sort(list(by)) if by else result).collect()
+
+
+# {column: (low, high)} at mean +- sigmas * std over the whole cube, same form as outliers.sigma_bounds
+def sigma_bounds(cube, columns, sigmas=3):
+    stats = summarize(cube, measures=columns).row(0, named=True)
+    bounds = {}
+    for column in columns:
+        mean, std = stats[f"{column}_mean"], stats[f"{column}_std"]
+        print(f"{column}: mean {mean}, std {std}")
+        bounds[column] = (mean - sigmas * std, mean + sigmas * std)
+    return bounds
+
+
+# Share of total earnings (pay + tips) that came from tips, per group of keys
+def tip_proportion(cube, by=()):
+    sums = [pl.col("tips_sum").sum(), pl.col("driver_pay_sum").sum()]
+    grouped = cube.group_by(list(by)).agg(sums) if by else cube.select(sums)
+    result = grouped.with_columns(
+        (pl.col("tips_sum") / (pl.col("tips_sum") + pl.col("driver_pay_sum"))).alias("tip_proportion")
+    )
+    return (result.sort(list(by)) if by else result).collect()
+
+
+if __name__ == "__main__":
+    sources = sys.argv[1] if len(sys.argv) > 1 else compact.sources()
+
+    start_time = time.perf_counter_ns()
+    changed = update(sources)
+    end_time = time.perf_counter_ns()
+    print(f"Aggregated {len(changed)} new or changed files")
+    print(f"Execution time: {(end_time - start_time) / 1_000_000:.3f} ms")
+
+    start_time = time.perf_counter_ns()
+    cube = load()
+    with pl.Config(tbl_rows=-1):
+        print(summarize(cube, ["year", "month"], ["tips", "driver_pay"]))
+        print(tip_proportion(cube, ["hour"]))
+    end_time = time.perf_counter_ns()
+    print(f"Query time: {(end_time - start_time) / 1_000_000:.3f} ms")
@@ -0,0 +1,148 @@
+import os
+import sys
+import csv
+import pickle
+import time
+from collections import Counter
+from datetime import timedelta
+from parallel_scan import parse_timestamp
+
+# Location of the raw data and of the pre-aggregated index built from it
+CSV_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../../../Downloads/2022_place_canvas_history.csv")
+INDEX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hour_index")
+
+ONE_HOUR = timedelta(hours=1)
+
+
+# Name of the files holding one hour bucket
+def bucket_name(hour):
+    return hour.strftime('%Y-%m-%d-%H')
+
+
+# Pass 1: split the CSV into one small row file per hour (timestamp, color, coordinate only)
+# Pass 2: count colors and coordinates for each hour file and pickle the counters
+def build_index(csv_path=CSV_PATH, index_dir=INDEX_DIR):
+    os.makedirs(os.path.join(index_dir, "rows"), exist_ok=True)
+    os.makedirs(os.path.join(index_dir, "hours"), exist_ok=True)
+
+    writers = {}
+    files = []
+    min_timestamp = None
+    max_timestamp = None
+
+    print("Splitting CSV into hour buckets")
+    with open(csv_path, 'r') as csvfile:
+        reader = csv.reader(csvfile)
+        header = next(reader)
+
+        for row in reader:
+            timestamp = parse_timestamp(row[0])
+
+            if min_timestamp is None or timestamp < min_timestamp:
+                min_timestamp = timestamp
+            if max_timestamp is None or timestamp > max_timestamp:
+                max_timestamp = timestamp
+
+            hour = timestamp.replace(minute=0, second=0, microsecond=0)
+            writer = writers.get(hour)
+            if writer is None:
+                rows_file = open(os.path.join(index_dir, "rows", bucket_name(hour) + ".csv"), 'w', newline='')
+                files.append(rows_file)
+                writer = csv.writer(rows_file)
+                writers[hour] = writer
+            writer.writerow((row[0], row[2], row[3]))
+
+    for rows_file in files:
+        rows_file.close()
+
+    if min_timestamp is None or max_timestamp is None:
+        print("Error: No valid timestamps found in data.")
+        sys.exit()
+
+    hours = sorted(writers)
+    for hour in hours:
+        print(f"Counting {bucket_name(hour)}")
+        color_counter = Counter()
+        coord_counter = Counter()
+        # Placements exactly on the hour, so an inclusive end bound needs no scan
+        on_hour_color_counter = Counter()
+        on_hour_coord_counter = Counter()
+
+        with open(os.path.join(index_dir, "rows", bucket_name(hour) + ".csv"), 'r', newline='') as rows_file:
+            for row in csv.reader(rows_file):
+                color_counter[row[1]] += 1
+                coord_counter[row[2]] += 1
+                if parse_timestamp(row[0]) == hour:
+                    on_hour_color_counter[row[1]] += 1
+                    on_hour_coord_counter[row[2]] += 1
+
+        with open(os.path.join(index_dir, "hours", bucket_name(hour) + ".pkl"), 'wb') as bucket_file:
+            pickle.dump((color_counter, coord_counter, on_hour_color_counter, on_hour_coord_counter),
+                        bucket_file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    with open(os.path.join(index_dir, "meta.pkl"), 'wb') as meta_file:
+        pickle.dump({"min": min_timestamp, "max": max_timestamp, "hours": hours}, meta_file)
+
+
+def index_exists(index_dir=INDEX_DIR):
+    return os.path.exists(os.path.join(index_dir, "meta.pkl"))
+
+
+def load_meta(index_dir=INDEX_DIR):
+    with open(os.path.join(index_dir, "meta.pkl"), 'rb') as meta_file:
+        return pickle.load(meta_file)
+
+
+def load_bucket(hour, index_dir=INDEX_DIR):
+    with open(os.path.join(index_dir, "hours", bucket_name(hour) + ".pkl"), 'rb') as bucket_file:
+        return pickle.load(bucket_file)
+
+
+# Exact count of a partially covered hour by scanning only that hour's rows
+def scan_bucket(hour, start, end, index_dir=INDEX_DIR):
+    color_counter = Counter()
+    coord_counter = Counter()
+    with open(os.path.join(index_dir, "rows", bucket_name(hour) + ".csv"), 'r', newline='') as rows_file:
+        for row in csv.reader(rows_file):
+            timestamp = parse_timestamp(row[0])
+            if start <= timestamp <= end:
+                color_counter[row[1]] += 1
+                coord_counter[row[2]] += 1
+    return color_counter, coord_counter
+
+
+# Color and coordinate counts for start <= timestamp <= end, same semantics as week1.py
+def count_range(start, end, index_dir=INDEX_DIR):
+    color_counter = Counter()
+    coord_counter = Counter()
+
+    for hour in load_meta(index_dir)["hours"]:
+        if hour + ONE_HOUR <= start or hour > end:
+            continue
+
+        if start <= hour and hour + ONE_HOUR <= end:
+            # Hour is fully inside the window, merge the stored counts
+            bucket_colors, bucket_coords, _, _ = load_bucket(hour, index_dir)
+        elif hour == end:
+            # Window ends exactly on this hour, only the placements at that instant count
+            _, _, bucket_colors, bucket_coords = load_bucket(hour, index_dir)
+        else:
+            # Partial hour at an edge of the window
+            bucket_colors, bucket_coords = scan_bucket(hour, start, end, index_dir)
+
+        color_counter.update(bucket_colors)
+        coord_counter.update(bucket_coords)
+
+    return color_counter, coord_counter
+
+
+if __name__ == "__main__":
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else CSV_PATH
+    index_dir = sys.argv[2] if len(sys.argv) > 2 else INDEX_DIR
+
+    start_time = time.perf_counter_ns()
+    build_index(csv_path, index_dir)
+    end_time = time.perf_counter_ns()
+
+    print(f"Index written to {index_dir}")
+    print(f"Execution time: {(end_time - start_time) / 1_000_000:.3f} ms")
@@ -0,0 +1,148 @@
+import os
+import sys
+import csv
+import time
+from collections import Counter
+from datetime import datetime
+from multiprocessing import Pool
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../../../Downloads/2022_place_canvas_history.csv")
+
+
+# Parse a raw timestamp with a fixed layout instead of strptime
+# "YYYY-MM-DD HH:MM:SS.fff UTC" or "YYYY-MM-DD HH:MM:SS UTC"
+def parse_timestamp(text):
+    microsecond = 0
+    if len(text) > 19 and text[19] == '.':
+        end = text.find(' ', 20)
+        if end == -1:
+            end = len(text)
+        # Pad the fraction on the right like %f does ("3" -> 300000)
+        microsecond = int(text[20:end].ljust(6, '0'))
+    return datetime(int(text[0:4]), int(text[5:7]), int(text[8:10]),
+                    int(text[11:13]), int(text[14:16]), int(text[17:19]), microsecond)
+
+
+# Split the file into byte ranges of roughly equal size
+def byte_ranges(csv_path, workers):
+    size = os.path.getsize(csv_path)
+    step = max(size // workers, 1)
+    ranges = []
+    for offset in range(0, size, step):
+        ranges.append((offset, min(offset + step, size)))
+    return ranges
+
+
+# Yield every line that starts inside [range_start, range_end)
+def lines_in_range(csvfile, range_start, range_end):
+    if range_start == 0:
+        # Skip the header
+        csvfile.readline()
+    else:
+        # Back up one byte so a range starting exactly on a line start keeps that line
+        csvfile.seek(range_start - 1)
+        csvfile.readline()
+
+    position = csvfile.tell()
+    while position < range_end:
+        line = csvfile.readline()
+        if not line:
+            break
+        position += len(line)
+        yield line.decode()
+
+
+# Worker: count colors and coordinates in one byte range
+def scan_range(args):
+    csv_path, range_start, range_end, start, end = args
+
+    color_counter = Counter()
+    coord_counter = Counter()
+    min_timestamp = None
+    max_timestamp = None
+
+    with open(csv_path, 'rb') as csvfile:
+        for row in csv.reader(lines_in_range(csvfile, range_start, range_end)):
+            timestamp = parse_timestamp(row[0])
+
+            # Update min and max timestamps
+            if min_timestamp is None or timestamp < min_timestamp:
+                min_timestamp = timestamp
+            if max_timestamp is None or timestamp > max_timestamp:
+                max_timestamp = timestamp
+
+            # If timestamp is within the range, count color and coordinates
+            if start <= timestamp <= end:
+                color_counter[row[2]] += 1
+                coord_counter[row[3]] += 1
+
+    return color_counter, coord_counter, min_timestamp, max_timestamp
+
+
+# Scan the CSV with one process per byte range and merge the partial results
+def scan(start, end, csv_path=CSV_PATH, workers=None):
+    workers = workers or os.cpu_count()
+    tasks = [(csv_path, range_start, range_end, start, end)
+             for range_start, range_end in byte_ranges(csv_path, workers)]
+
+    color_counter = Counter()
+    coord_counter = Counter()
+    min_timestamp = None
+    max_timestamp = None
+
+    with Pool(workers) as pool:
+        # Merge in file order so ties resolve the same way as the serial loop
+        for part_colors, part_coords, part_min, part_max in pool.imap(scan_range, tasks):
+            color_counter.update(part_colors)
+            coord_counter.update(part_coords)
+            if part_min is not None and (min_timestamp is None or part_min < min_timestamp):
+                min_timestamp = part_min
+            if part_max is not None and (max_timestamp is None or part_max > max_timestamp):
+                max_timestamp = part_max
+
+    return color_counter, coord_counter, min_timestamp, max_timestamp
+
+
+if __name__ == "__main__":
+    # Check for valid args
+    if len(sys.argv) < 5:
+        print("Intended use: python3 parallel_scan.py YYYY-MM-DD HH YYYY-MM-DD HH [workers]")
+        sys.exit()
+
+    start = datetime.strptime(sys.argv[1] + " " + sys.argv[2], '%Y-%m-%d %H')
+    end = datetime.strptime(sys.argv[3] + " " + sys.argv[4], '%Y-%m-%d %H')
+    workers = int(sys.argv[5]) if len(sys.argv) > 5 else os.cpu_count()
+
+    # Validate that end date is not before start date
+    if start > end:
+        print("Error: start date is after end date")
+        sys.exit()
+
+    # Start the timer
+    start_time = time.perf_counter_ns()
+
+    color_counter, coord_counter, min_timestamp, max_timestamp = scan(start, end, CSV_PATH, workers)
+
+    if min_timestamp is None or max_timestamp is None:
+        print("Error: No valid timestamps found in data.")
+        sys.exit()
+
+    if end < min_timestamp or start > max_timestamp:
+        print(f"Error: Given time input is not represented in data, which ranges from {min_timestamp} to {max_timestamp}.")
+        sys.exit()
+
+    # Find the most common color and coordinates
+    most_common_color = color_counter.most_common(1)[0][0]
+    most_common_coord = coord_counter.most_common(1)[0][0]
+
+    # Stop the timer
+    end_time = time.perf_counter_ns()
+
+    # Calculate execution time in milliseconds
+    execution_time = (end_time - start_time) / 1_000_000
+
+    # Output the results
+    print(f"Workers: {workers}")
+    print(f"Most common color: {most_common_color}")
+    print(f"Most common coord: {most_common_coord}")
+    print(f"Execution time: {execution_time:.3f} ms")
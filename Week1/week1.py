@@ -3,16 +3,21 @@ import csv
 from collections import Counter
 from datetime import datetime
 import time
+import hour_index
+
+# --index answers from the hour index instead of scanning the CSV
+use_index = "--index" in sys.argv
+args = [arg for arg in sys.argv[1:] if arg != "--index"]
 
 # Check for valid args
-if len(sys.argv) < 5:
-    print("Intended use: python3 week1.py YYYY-MM-DD HH YYYY-MM-DD HH")
+if len(args) < 4:
+    print("Intended use: python3 week1.py YYYY-MM-DD HH YYYY-MM-DD HH [--index]")
     sys.exit()
 
-start_date = sys.argv[1]
-start_hour = sys.argv[2]
-end_date = sys.argv[3]
-end_hour = sys.argv[4]
+start_date = args[0]
+start_hour = args[1]
+end_date = args[2]
+end_hour = args[3]
 
 # Convert to datetime objects for comparison
 start = datetime.strptime(start_date + " " + start_hour, '%Y-%m-%d %H')
@@ -23,6 +28,10 @@ if start > end:
     print("Error: start date is after end date")
     sys.exit()
 
+if use_index and not hour_index.index_exists():
+    print("Error: hour index not built, run python3 hour_index.py first")
+    sys.exit()
+
 # Start the timer
 start_time = time.perf_counter_ns()
 
@@ -31,32 +40,39 @@ start_time = time.perf_counter_ns()
 color_counter = Counter()
 coord_counter = Counter()
 
-with open("../../../../Downloads/2022_place_canvas_history.csv", 'r') as csvfile:
-    reader = csv.reader(csvfile)
-    header = next(reader)
-
-    min_timestamp = None
-    max_timestamp = None
-
-    for row in reader:
-        date_pieces = row[0].split()
-        try:
-            # Try parsing with fractional seconds
-            timestamp = datetime.strptime(date_pieces[0] + " " + date_pieces[1], '%Y-%m-%d %H:%M:%S.%f')
-        except ValueError:
-            # If it fails, parse without fractional seconds
-            timestamp = datetime.strptime(date_pieces[0] + " " + date_pieces[1], '%Y-%m-%d %H:%M:%S')
-
-        # Update min and max timestamps
-        if min_timestamp is None or timestamp < min_timestamp:
-            min_timestamp = timestamp
-        if max_timestamp is None or timestamp > max_timestamp:
-            max_timestamp = timestamp
-
-        # If timestamp is within the range, count color and coordinates
-        if start <= timestamp <= end:
-            color_counter[row[2]] += 1
-            coord_counter[row[3]] += 1
+if use_index:
+    # Answer from the pre-aggregated hour buckets instead of the CSV (build them once with: python3 hour_index.py)
+    meta = hour_index.load_meta()
+    min_timestamp = meta["min"]
+    max_timestamp = meta["max"]
+    color_counter, coord_counter = hour_index.count_range(start, end)
+else:
+    with open("../../../../Downloads/2022_place_canvas_history.csv", 'r') as csvfile:
+        reader = csv.reader(csvfile)
+        header = next(reader)
+
+        min_timestamp = None
+        max_timestamp = None
+
+        for row in reader:
+            date_pieces = row[0].split()
+            try:
+                # Try parsing with fractional seconds
+                timestamp = datetime.strptime(date_pieces[0] + " " + date_pieces[1], '%Y-%m-%d %H:%M:%S.%f')
+            except ValueError:
+                # If it fails, parse without fractional seconds
+                timestamp = datetime.strptime(date_pieces[0] + " " + date_pieces[1], '%Y-%m-%d %H:%M:%S')
+
+            # Update min and max timestamps
+            if min_timestamp is None or timestamp < min_timestamp:
+                min_timestamp = timestamp
+            if max_timestamp is None or timestamp > max_timestamp:
+                max_timestamp = timestamp
+
+            # If timestamp is within the range, count color and coordinates
+            if start <= timestamp <= end:
+                color_counter[row[2]] += 1
+                coord_counter[row[3]] += 1
 
 if min_timestamp is None or max_timestamp is None:
     print("Error: No valid timestamps found in data.")
@@ -0,0 +1,301 @@
+import os
+import sys
+import json
+import time
+import platform
+import resource
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+# The csv-module engines live next to the Week 1 script
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../Week1"))
+
+CSV_PATH = '../../../../../Downloads/2022_place_canvas_history.csv'
+
+# Same start hour for every window so the sizes are directly comparable
+DEFAULT_START = "2022-04-01 14"
+DEFAULT_WINDOWS = [1, 3, 6, 12]
+
+
+# Every engine answers the same question: the most placed color and coordinate with
+# start <= timestamp <= end. Ties are broken by the smallest value so all engines agree.
+# The cache dict lives for the whole process, so a second call is a warm run.
+
+def top_value(counter):
+    if not counter:
+        return None
+    return min(counter.items(), key=lambda item: (-item[1], item[0]))[0]
+
+
+def run_duckdb(csv_path, start, end, cache):
+    import duckdb
+
+    if "con" not in cache:
+        con = duckdb.connect()
+        con.execute("SET TimeZone = 'UTC'")
+        con.execute("CREATE TABLE my_table AS SELECT * FROM read_csv(?)", [csv_path])
+        cache["con"] = con
+    con = cache["con"]
+
+    query = """SELECT {column}
+               FROM my_table
+               WHERE timestamp BETWEEN ?::TIMESTAMPTZ AND ?::TIMESTAMPTZ
+               GROUP BY {column}
+               ORDER BY COUNT(*) DESC, {column}
+               LIMIT 1"""
+    bounds = [start.strftime('%Y-%m-%d %H:%M:%S+00'), end.strftime('%Y-%m-%d %H:%M:%S+00')]
+    color = con.execute(query.format(column="pixel_color"), bounds).fetchone()
+    coord = con.execute(query.format(column="coordinate"), bounds).fetchone()
+    return (color[0] if color else None), (coord[0] if coord else None)
+
+
+def run_duckdb_persistent(csv_path, start, end, cache):
+    import duckdb_store
+
+    # Uses the database file built once by duckdb_store.py, so even a cold run skips the CSV load
+    if "con" not in cache:
+        if not duckdb_store.database_exists():
+            raise FileNotFoundError(f"{duckdb_store.DB_PATH} not built, run python3 duckdb_store.py first")
+        cache["con"] = duckdb_store.connect()
+    return duckdb_store.top_color_and_coord(cache["con"], start, end)
+
+
+def run_polars(csv_path, start, end, cache):
+    import polars as pl
+
+    if "df" not in cache:
+        df = pl.read_csv(csv_path, columns=["timestamp", "pixel_color", "coordinate"])
+        # Same timestamp cleanup as Week 3: drop " UTC", pad missing milliseconds, parse
+        df = df.with_columns(pl.col("timestamp").str.replace(r" UTC$", ""))
+        df = df.with_columns(
+            pl.when(~pl.col("timestamp").str.contains(r"\."))
+            .then(pl.concat_str([pl.col("timestamp"), pl.lit(".000")]))
+            .otherwise(pl.col("timestamp"))
+            .str.to_datetime(format="%Y-%m-%d %H:%M:%S%.f")
+            .alias("timestamp")
+        )
+        cache["df"] = df
+    df = cache["df"]
+
+    df_filtered = df.filter(pl.col("timestamp").is_between(start, end))
+    answers = []
+    for column in ["pixel_color", "coordinate"]:
+        top = (df_filtered.group_by(column).len()
+               .sort(["len", column], descending=[True, False])
+               .head(1))
+        answers.append(top[column][0] if top.height else None)
+    return tuple(answers)
+
+
+def run_polars_lazy(csv_path, start, end, cache):
+    import polars_lazy
+
+    return polars_lazy.top_color_and_coord(start, end, csv_path)
+
+
+def run_pandas(csv_path, start, end, cache):
+    import pandas as pd
+    from collections import Counter
+
+    color_counter = Counter()
+    coord_counter = Counter()
+    for chunk in pd.read_csv(csv_path, chunksize=100000, usecols=["timestamp", "pixel_color", "coordinate"]):
+        timestamps = pd.to_datetime(chunk["timestamp"].str.replace(" UTC", "", regex=False), format="ISO8601")
+        chunk_filtered = chunk[(timestamps >= start) & (timestamps <= end)]
+        color_counter.update(chunk_filtered["pixel_color"])
+        coord_counter.update(chunk_filtered["coordinate"])
+    return top_value(color_counter), top_value(coord_counter)
+
+
+def run_csv(csv_path, start, end, cache):
+    import csv
+    from collections import Counter
+
+    # The original Week 1 loop: csv.reader and strptime on every row
+    color_counter = Counter()
+    coord_counter = Counter()
+    with open(csv_path, 'r') as csvfile:
+        reader = csv.reader(csvfile)
+        next(reader)
+        for row in reader:
+            date_pieces = row[0].split()
+            try:
+                timestamp = datetime.strptime(date_pieces[0] + " " + date_pieces[1], '%Y-%m-%d %H:%M:%S.%f')
+            except ValueError:
+                timestamp = datetime.strptime(date_pieces[0] + " " + date_pieces[1], '%Y-%m-%d %H:%M:%S')
+            if start <= timestamp <= end:
+                color_counter[row[2]] += 1
+                coord_counter[row[3]] += 1
+    return top_value(color_counter), top_value(coord_counter)
+
+
+def run_csv_serial(csv_path, start, end, cache):
+    import parallel_scan
+
+    # The fixed-layout parser of parallel_scan.py on a single byte range covering the whole file
+    color_counter, coord_counter, _, _ = parallel_scan.scan_range(
+        (csv_path, 0, os.path.getsize(csv_path), start, end))
+    return top_value(color_counter), top_value(coord_counter)
+
+
+def run_csv_parallel(csv_path, start, end, cache):
+    import parallel_scan
+
+    color_counter, coord_counter, _, _ = parallel_scan.scan(start, end, csv_path)
+    return top_value(color_counter), top_value(coord_counter)
+
+
+ENGINES = {
+    "duckdb": run_duckdb,
+    "duckdb_persistent": run_duckdb_persistent,
+    "polars": run_polars,
+    "polars_lazy": run_polars_lazy,
+    "pandas": run_pandas,
+    "csv": run_csv,
+    "csv_serial": run_csv_serial,
+    "csv_parallel": run_csv_parallel,
+}
+
+
+# Coordinates come back as '859,766', "859, 766" or (859, 766) depending on the engine
+def normalize_coord(coord):
+    if coord is None:
+        return None
+    if isinstance(coord, (tuple, list)):
+        return ",".join(str(value) for value in coord)
+    return str(coord).strip("()'\" ").replace(" ", "")
+
+
+def cpu_seconds():
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+# Peak of this process (who=RUSAGE_SELF) or of the largest finished child process, such as
+# the csv_parallel workers (who=RUSAGE_CHILDREN)
+def peak_rss_mb(who=resource.RUSAGE_SELF):
+    peak = resource.getrusage(who).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+# Runs inside a fresh process: one cold call, then warm calls reusing the engine cache
+def run_trial(engine, csv_path, start, end, warm_runs):
+    cache = {}
+    runs = []
+    for run in range(1 + warm_runs):
+        wall_start = time.perf_counter_ns()
+        cpu_start = cpu_seconds()
+        color, coord = ENGINES[engine](csv_path, start, end, cache)
+        wall_ms = (time.perf_counter_ns() - wall_start) / 1_000_000
+        cpu_ms = (cpu_seconds() - cpu_start) * 1000
+
+        runs.append({
+            "phase": "cold" if run == 0 else "warm",
+            "wall_ms": round(wall_ms, 3),
+            "cpu_ms": round(cpu_ms, 3),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            "peak_child_rss_mb": round(peak_rss_mb(resource.RUSAGE_CHILDREN), 1),
+            "color": color,
+            "coord": normalize_coord(coord),
+        })
+    return runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the same range query on every engine and record timings")
+    parser.add_argument("--csv", default=CSV_PATH)
+    parser.add_argument("--engines", default=",".join(ENGINES))
+    parser.add_argument("--start", default=DEFAULT_START, help="YYYY-MM-DD HH")
+    parser.add_argument("--windows", default=",".join(str(hours) for hours in DEFAULT_WINDOWS),
+                        help="window sizes in hours")
+    parser.add_argument("--trials", type=int, default=3)
+    parser.add_argument("--warm-runs", type=int, default=1)
+    parser.add_argument("--output", default="benchmark_results.json")
+    args = parser.parse_args()
+
+    engines = args.engines.split(",")
+    for engine in engines:
+        if engine not in ENGINES:
+            print(f"Error: unknown engine {engine}, choose from {', '.join(ENGINES)}")
+            sys.exit()
+
+    start = datetime.strptime(args.start, '%Y-%m-%d %H')
+    windows = [int(hours) for hours in args.windows.split(",")]
+
+    # Every trial gets a brand new process so "cold" really means nothing is cached in memory
+    context = multiprocessing.get_context("spawn")
+
+    results = []
+    for hours in windows:
+        end = start + timedelta(hours=hours)
+        for engine in engines:
+            for trial in range(args.trials):
+                print(f"{engine}: {hours}h window, trial {trial + 1}/{args.trials}")
+                # Executor workers (unlike Pool workers) may start their own processes for csv_parallel
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                    try:
+                        runs = executor.submit(run_trial, engine, args.csv, start, end, args.warm_runs).result()
+                    except (ImportError, FileNotFoundError) as error:
+                        print(f"Skipping {engine}: {error}")
+                        break
+                for run in runs:
+                    run.update({"engine": engine, "window_hours": hours, "trial": trial,
+                                "start": str(start), "end": str(end)})
+                    results.append(run)
+
+    # Every engine has to agree on every window
+    mismatches = []
+    for hours in windows:
+        answers = {(run["color"], run["coord"]) for run in results if run["window_hours"] == hours}
+        if len(answers) > 1:
+            mismatches.append({
+                "window_hours": hours,
+                "answers": sorted({(run["engine"], run["color"], run["coord"])
+                                   for run in results if run["window_hours"] == hours}),
+            })
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "machine": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+        },
+        "csv": os.path.abspath(args.csv),
+        "trials": args.trials,
+        "warm_runs": args.warm_runs,
+        "results": results,
+        "consistent": not mismatches,
+        "mismatches": mismatches,
+    }
+    with open(args.output, "w") as output:
+        json.dump(report, output, indent=2)
+
+    # Median wall time per engine / window / phase
+    print(f"\n{'engine':<16}{'window':>8}{'phase':>7}{'wall ms':>14}{'cpu ms':>14}{'rss MB':>10}{'child MB':>10}  answer")
+    for hours in windows:
+        for engine in engines:
+            for phase in ["cold", "warm"]:
+                runs = sorted((run for run in results
+                               if run["engine"] == engine and run["window_hours"] == hours and run["phase"] == phase),
+                              key=lambda run: run["wall_ms"])
+                if not runs:
+                    continue
+                median = runs[len(runs) // 2]
+                print(f"{engine:<16}{str(hours) + 'h':>8}{phase:>7}{median['wall_ms']:>14.3f}{median['cpu_ms']:>14.3f}"
+                      f"{median['peak_rss_mb']:>10.1f}{median['peak_child_rss_mb']:>10.1f}  {median['color']} ({median['coord']})")
+
+    if mismatches:
+        print("\nError: engines disagree:")
+        for mismatch in mismatches:
+            print(f"  {mismatch['window_hours']}h: {mismatch['answers']}")
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
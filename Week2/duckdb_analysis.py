@@ -1,16 +1,27 @@
 import duckdb
 import sys 
 import time
+import os
+from datetime import datetime
+
+# Shared hour-bucket index lives next to the Week 1 script
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../Week1"))
+import hour_index
+import duckdb_store
+
+# --index answers from the Week 1 hour index instead of running the engine
+use_index = "--index" in sys.argv
+args = [arg for arg in sys.argv[1:] if arg != "--index"]
 
 # Check for valid args
-if len(sys.argv) < 5:
-    print("Intended use: python3 week1.py YYYY-MM-DD HH YYYY-MM-DD HH")
+if len(args) < 4:
+    print("Intended use: python3 duckdb_analysis.py YYYY-MM-DD HH YYYY-MM-DD HH [--index]")
     sys.exit()
 
-start_date = sys.argv[1]
-start_hour = sys.argv[2]
-end_date = sys.argv[3]
-end_hour = sys.argv[4]
+start_date = args[0]
+start_hour = args[1]
+end_date = args[2]
+end_hour = args[3]
 
 # Combine the date and hour into strings
 start_str = start_date + " " + start_hour + ":00:00"  # Format it as YYYY-MM-DD HH:00:00
@@ -21,26 +32,42 @@ if start_str > end_str:
     print("Error: start date is after end date")
     sys.exit()
 
+if use_index and not hour_index.index_exists():
+    print("Error: hour index not built, run python3 ../Week1/hour_index.py first")
+    sys.exit()
+
 # Start the timer
 start_time = time.perf_counter_ns()
 
 # From the data, find the most placed color during that timeframe 
 # and the most placed pixel location during that timeframe.
-con = duckdb.connect()
-con.execute("CREATE TABLE my_table AS SELECT * FROM read_csv('../../../../../Downloads/2022_place_canvas_history.csv')")
-most_common_color = con.execute(f"""SELECT pixel_color
-                  FROM my_table 
-                  WHERE timestamp BETWEEN TIMESTAMP '{start_str}' AND TIMESTAMP '{end_str}' 
-                  GROUP BY pixel_color 
-                  ORDER BY COUNT(pixel_color) DESC 
-                  LIMIT 1""").fetchall()
-
-most_common_coord = con.execute(f"""SELECT coordinate 
-                  FROM my_table 
-                  WHERE timestamp BETWEEN TIMESTAMP '{start_str}' AND TIMESTAMP '{end_str}' 
-                  GROUP BY coordinate
-                  ORDER BY COUNT(coordinate) DESC 
-                  LIMIT 1""").fetchall()
+if use_index:
+    # Answer from the pre-aggregated hour buckets instead of the engine (build them once with: python3 ../Week1/hour_index.py)
+    color_counter, coord_counter = hour_index.count_range(
+        datetime.strptime(start_str, "%Y-%m-%d %H:%M:%S"), datetime.strptime(end_str, "%Y-%m-%d %H:%M:%S"))
+    most_common_color = color_counter.most_common(1)[0][0] if color_counter else None
+    most_common_coord = coord_counter.most_common(1)[0][0] if coord_counter else None
+elif duckdb_store.database_exists():
+    # Reuse the typed, timestamp-sorted database file (build it once with: python3 duckdb_store.py)
+    con = duckdb_store.connect()
+    most_common_color, most_common_coord = duckdb_store.top_color_and_coord(
+        con, datetime.strptime(start_str, "%Y-%m-%d %H:%M:%S"), datetime.strptime(end_str, "%Y-%m-%d %H:%M:%S"))
+else:
+    con = duckdb.connect()
+    con.execute("CREATE TABLE my_table AS SELECT * FROM read_csv('../../../../../Downloads/2022_place_canvas_history.csv')")
+    most_common_color = con.execute("""SELECT pixel_color
+                      FROM my_table 
+                      WHERE timestamp BETWEEN CAST(? AS TIMESTAMP) AND CAST(? AS TIMESTAMP)
+                      GROUP BY pixel_color 
+                      ORDER BY COUNT(pixel_color) DESC 
+                      LIMIT 1""", [start_str, end_str]).fetchall()
+
+    most_common_coord = con.execute("""SELECT coordinate 
+                      FROM my_table 
+                      WHERE timestamp BETWEEN CAST(? AS TIMESTAMP) AND CAST(? AS TIMESTAMP)
+                      GROUP BY coordinate
+                      ORDER BY COUNT(coordinate) DESC 
+                      LIMIT 1""", [start_str, end_str]).fetchall()
 
 # Stop the timer
 end_time = time.perf_counter_ns()
@@ -0,0 +1,72 @@
+import duckdb
+import os
+import sys
+import time
+
+CSV_PATH = '../../../../../Downloads/2022_place_canvas_history.csv'
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "place.duckdb")
+
+# Both top-1 answers from a single scan: one grouping set per column,
+# then keep the highest count in each set (ties go to the smallest value)
+TOP_QUERY = """
+WITH counts AS (
+    SELECT GROUPING(pixel_color) AS by_coord, pixel_color, coordinate, COUNT(*) AS placements
+    FROM placements
+    WHERE timestamp BETWEEN ? AND ?
+    GROUP BY GROUPING SETS ((pixel_color), (coordinate))
+)
+SELECT by_coord, pixel_color, coordinate
+FROM counts
+QUALIFY row_number() OVER (PARTITION BY by_coord ORDER BY placements DESC, pixel_color, coordinate) = 1
+"""
+
+
+# Load the CSV once into a typed table sorted by timestamp, so the
+# per-row-group min/max (zone maps) let range filters skip most of the file
+def build_database(csv_path=CSV_PATH, db_path=DB_PATH):
+    con = duckdb.connect(db_path)
+    con.execute("""
+        CREATE OR REPLACE TABLE placements AS
+        SELECT CAST(replace(timestamp, ' UTC', '') AS TIMESTAMP) AS timestamp,
+               user_id,
+               pixel_color,
+               coordinate
+        FROM read_csv(?, header = true,
+                      columns = {'timestamp': 'VARCHAR', 'user_id': 'VARCHAR',
+                                 'pixel_color': 'VARCHAR', 'coordinate': 'VARCHAR'})
+        ORDER BY timestamp
+    """, [csv_path])
+    con.execute("CHECKPOINT")
+    return con
+
+
+def connect(db_path=DB_PATH):
+    return duckdb.connect(db_path, read_only=True)
+
+
+def database_exists(db_path=DB_PATH):
+    return os.path.exists(db_path)
+
+
+# Most placed color and coordinate with start <= timestamp <= end
+def top_color_and_coord(con, start, end):
+    most_common_color = None
+    most_common_coord = None
+    for by_coord, pixel_color, coordinate in con.execute(TOP_QUERY, [start, end]).fetchall():
+        if by_coord:
+            most_common_coord = coordinate
+        else:
+            most_common_color = pixel_color
+    return most_common_color, most_common_coord
+
+
+if __name__ == "__main__":
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else CSV_PATH
+    db_path = sys.argv[2] if len(sys.argv) > 2 else DB_PATH
+
+    start_time = time.perf_counter_ns()
+    print(f"Loading {csv_path} into {db_path}")
+    build_database(csv_path, db_path).close()
+    end_time = time.perf_counter_ns()
+
+    print(f"Execution time: {(end_time - start_time) / 1_000_000:.3f} ms")
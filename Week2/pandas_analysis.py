@@ -2,16 +2,26 @@ import pandas as pd
 import sys
 import time
 from collections import Counter
+import os
+from datetime import datetime
+
+# Shared hour-bucket index lives next to the Week 1 script
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../Week1"))
+import hour_index
+
+# --index answers from the Week 1 hour index instead of running the engine
+use_index = "--index" in sys.argv
+args = [arg for arg in sys.argv[1:] if arg != "--index"]
 
 # Check for valid args
-if len(sys.argv) < 5:
-    print("Intended use: python3 week1.py YYYY-MM-DD HH YYYY-MM-DD HH")
+if len(args) < 4:
+    print("Intended use: python3 pandas_analysis.py YYYY-MM-DD HH YYYY-MM-DD HH [--index]")
     sys.exit()
 
-start_date = sys.argv[1]
-start_hour = sys.argv[2]
-end_date = sys.argv[3]
-end_hour = sys.argv[4]
+start_date = args[0]
+start_hour = args[1]
+end_date = args[2]
+end_hour = args[3]
 
 # Combine the date and hour into strings
 start_str = start_date + " " + start_hour + ":00:00"  # Format it as YYYY-MM-DD HH:00:00
@@ -22,27 +32,38 @@ if start_str > end_str:
     print("Error: start date is after end date")
     sys.exit()
 
+if use_index and not hour_index.index_exists():
+    print("Error: hour index not built, run python3 ../Week1/hour_index.py first")
+    sys.exit()
+
 # Start the timer
 start_time = time.perf_counter_ns()
 
-# Efficient CSV reading with datetime parsing and chunking
-chunksize = 100000  # Adjust based on memory available
-color_counter = Counter()  # To count occurrences of each color
-coord_counter = Counter()  # To count occurrences of each coordinate
+if use_index:
+    # Answer from the pre-aggregated hour buckets instead of the engine (build them once with: python3 ../Week1/hour_index.py)
+    color_counter, coord_counter = hour_index.count_range(
+        datetime.strptime(start_str, "%Y-%m-%d %H:%M:%S"), datetime.strptime(end_str, "%Y-%m-%d %H:%M:%S"))
+    most_common_color = color_counter.most_common(1)[0][0] if color_counter else None
+    most_common_coord = coord_counter.most_common(1)[0][0] if coord_counter else None
+else:
+    # Efficient CSV reading with datetime parsing and chunking
+    chunksize = 100000  # Adjust based on memory available
+    color_counter = Counter()  # To count occurrences of each color
+    coord_counter = Counter()  # To count occurrences of each coordinate
 
-for chunk in pd.read_csv('../../../../../Downloads/2022_place_canvas_history.csv', 
-                         chunksize=chunksize, 
-                         parse_dates=['timestamp']):
-    # Filter the data based on the timestamp range
-    chunk_filtered = chunk[(chunk['timestamp'] >= start_str) & (chunk['timestamp'] <= end_str)]
+    for chunk in pd.read_csv('../../../../../Downloads/2022_place_canvas_history.csv', 
+                             chunksize=chunksize, 
+                             parse_dates=['timestamp']):
+        # Filter the data based on the timestamp range
+        chunk_filtered = chunk[(chunk['timestamp'] >= start_str) & (chunk['timestamp'] <= end_str)]
     
-    # Update the frequency counts for color and coordinate
-    color_counter.update(chunk_filtered['pixel_color'])
-    coord_counter.update(chunk_filtered['coordinate'])
+        # Update the frequency counts for color and coordinate
+        color_counter.update(chunk_filtered['pixel_color'])
+        coord_counter.update(chunk_filtered['coordinate'])
 
-# After processing all chunks, get the most common color and coordinate
-most_common_color = color_counter.most_common(1)[0][0] if color_counter else None
-most_common_coord = coord_counter.most_common(1)[0][0] if coord_counter else None
+    # After processing all chunks, get the most common color and coordinate
+    most_common_color = color_counter.most_common(1)[0][0] if color_counter else None
+    most_common_coord = coord_counter.most_common(1)[0][0] if coord_counter else None
 
 # Stop the timer
 end_time = time.perf_counter_ns()
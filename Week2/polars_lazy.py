@@ -0,0 +1,54 @@
+import polars as pl
+
+CSV_PATH = '../../../../../Downloads/2022_place_canvas_history.csv'
+
+
+# Lazily scan only the three columns the range query needs, with a typed timestamp
+def scan_placements(source=CSV_PATH):
+    if source.endswith(".parquet"):
+        lf = pl.scan_parquet(source)
+    else:
+        lf = pl.scan_csv(source, schema_overrides={"timestamp": pl.String})
+
+    if "coordinate" in lf.collect_schema():
+        lf = lf.select(["timestamp", "pixel_color", "coordinate"])
+    else:
+        # Canonical Parquet from Week4/create_parquet.py stores x/y as integers
+        lf = lf.select(
+            "timestamp",
+            pl.col("pixel_color").cast(pl.String),
+            pl.format("{},{}", "x", "y").alias("coordinate"),
+        )
+
+    if lf.collect_schema()["timestamp"] == pl.String:
+        # Same cleanup as Week 3: drop " UTC", pad missing milliseconds, parse
+        lf = lf.with_columns(
+            pl.col("timestamp").str.replace(r" UTC$", "")
+        ).with_columns(
+            pl.when(~pl.col("timestamp").str.contains(r"\."))
+            .then(pl.concat_str([pl.col("timestamp"), pl.lit(".000")]))
+            .otherwise(pl.col("timestamp"))
+            .str.to_datetime(format="%Y-%m-%d %H:%M:%S%.f")
+            .alias("timestamp")
+        )
+    return lf
+
+
+# Highest count first, ties go to the smallest value
+def top_value(lf, column):
+    return (lf.group_by(column).len()
+            .sort(["len", column], descending=[True, False])
+            .head(1)
+            .select(column))
+
+
+# Most placed color and coordinate with start <= timestamp <= end.
+# Both answers come from one collect_all call, so the scan and filter are shared
+# and run on the streaming engine in bounded memory.
+def top_color_and_coord(start, end, source=CSV_PATH):
+    lf = scan_placements(source).filter(pl.col("timestamp").is_between(start, end))
+    color, coord = pl.collect_all([top_value(lf, "pixel_color"), top_value(lf, "coordinate")], engine="streaming")
+
+    most_common_color = color["pixel_color"][0] if color.height else None
+    most_common_coord = coord["coordinate"][0] if coord.height else None
+    return most_common_color, most_common_coord
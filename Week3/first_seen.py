@@ -0,0 +1,78 @@
+import os
+import sys
+import time
+import numpy as np
+import polars as pl
+from datetime import datetime, timedelta
+
+# Every user's first placement, built once from the canonical parquet:
+#   first_seen.parquet  user_id, first_timestamp (sorted by first_timestamp)
+#   first_seen.npy      the sorted first timestamps as int64 milliseconds
+# "New users in [start, end]" is then two binary searches on the array.
+PARQUET_PATH = '../Week4/place.parquet'
+TABLE_PATH = 'first_seen.parquet'
+ARRAY_PATH = 'first_seen.npy'
+
+
+def build(parquet_path=PARQUET_PATH, table_path=TABLE_PATH, array_path=ARRAY_PATH):
+    first_seen = (
+        pl.scan_parquet(parquet_path)
+        .group_by("user_id")
+        .agg(pl.col("timestamp").min().alias("first_timestamp"))
+        .sort("first_timestamp")
+        .collect(engine="streaming")
+    )
+    first_seen.write_parquet(table_path)
+    np.save(array_path, first_seen["first_timestamp"].dt.epoch("ms").to_numpy())
+
+
+def exists(array_path=ARRAY_PATH):
+    return os.path.exists(array_path)
+
+
+# Memory-mapped so only the pages touched by the binary search are read
+def load(array_path=ARRAY_PATH):
+    return np.load(array_path, mmap_mode='r')
+
+
+def to_ms(timestamp):
+    return int((timestamp - datetime(1970, 1, 1)) / timedelta(milliseconds=1))
+
+
+# Users whose first placement falls in start <= timestamp <= end
+def count_new_users(first_seen, start, end):
+    return int(np.searchsorted(first_seen, to_ms(end), side='right')
+               - np.searchsorted(first_seen, to_ms(start), side='left'))
+
+
+# New users per bucket over [start, end), e.g. one value per hour of the event
+def new_users_curve(first_seen, start, end, bucket=timedelta(hours=1)):
+    edges = []
+    edge = start
+    while edge <= end:
+        edges.append(edge)
+        edge += bucket
+    positions = np.searchsorted(first_seen, [to_ms(edge) for edge in edges], side='left')
+    return pl.DataFrame({
+        "bucket_start": edges[:-1],
+        "new_users": np.diff(positions),
+    })
+
+
+if __name__ == "__main__":
+    parquet_path = sys.argv[1] if len(sys.argv) > 1 else PARQUET_PATH
+
+    start_time = time.perf_counter_ns()
+    print("Building first-seen table")
+    build(parquet_path)
+    end_time = time.perf_counter_ns()
+
+    # New users per hour for the whole event
+    first_seen = load()
+    event_start = (datetime(1970, 1, 1) + timedelta(milliseconds=int(first_seen[0]))).replace(minute=0, second=0, microsecond=0)
+    event_end = datetime(1970, 1, 1) + timedelta(milliseconds=int(first_seen[-1])) + timedelta(hours=1)
+    with pl.Config(tbl_rows=-1):
+        print(new_users_curve(first_seen, event_start, event_end))
+
+    print(f"Users: {len(first_seen)}")
+    print(f"Execution time: {(end_time - start_time) / 1_000_000:.3f} ms")
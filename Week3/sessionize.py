@@ -0,0 +1,145 @@
+import polars as pl
+import pyarrow.dataset as ds
+from datetime import timedelta
+
+# Placements more than GAP apart start a new session for that user
+GAP = timedelta(minutes=15)
+BATCH_SIZE = 1_000_000
+
+SESSION_SCHEMA = {
+    "user": pl.UInt64,
+    "session_start": pl.Datetime("ms"),
+    "session_end": pl.Datetime("ms"),
+    "session_count": pl.UInt32,
+}
+
+
+# Stream (user, timestamp) batches in timestamp order from the canonical parquet.
+# The filter lets pyarrow skip every row group whose min/max is outside the window.
+def read_batches(source, start, end, user_column="user_id", batch_size=BATCH_SIZE):
+    dataset = ds.dataset(source, format="parquet")
+    scanner = dataset.scanner(
+        columns={"user": ds.field(user_column), "timestamp": ds.field("timestamp")},
+        filter=(ds.field("timestamp") >= start) & (ds.field("timestamp") <= end),
+        batch_size=batch_size,
+    )
+    for record_batch in scanner.to_batches():
+        yield pl.from_arrow(record_batch)
+
+
+def as_sessions(open_sessions):
+    return open_sessions.select(
+        pl.col("user").cast(SESSION_SCHEMA["user"]),
+        pl.col("open_start").alias("session_start"),
+        pl.col("open_end").alias("session_end"),
+        pl.col("open_count").alias("session_count"),
+    )
+
+
+# Consume timestamp-ordered batches and yield finished sessions as soon as they are known.
+# Only the currently open session of each recently active user is kept between batches.
+def sessionize(batches, gap=GAP):
+    open_sessions = pl.DataFrame(schema={
+        "user": pl.UInt64,
+        "open_start": pl.Datetime("ms"),
+        "open_end": pl.Datetime("ms"),
+        "open_count": pl.UInt32,
+    })
+
+    for batch in batches:
+        if batch.height == 0:
+            continue
+        batch = batch.with_columns(
+            pl.col("user").cast(pl.UInt64),
+            pl.col("timestamp").cast(pl.Datetime("ms")),
+        )
+
+        # Number the sessions of each user inside this batch. Session 0 is the
+        # continuation of the session that was still open from earlier batches.
+        events = (
+            batch.sort(["user", "timestamp"])
+            .join(open_sessions, on="user", how="left", maintain_order="left")
+            .with_columns(
+                pl.col("timestamp").shift(1).over("user").fill_null(pl.col("open_end")).alias("previous")
+            )
+            .with_columns(
+                (pl.col("previous").is_null() | ((pl.col("timestamp") - pl.col("previous")) > gap))
+                .cast(pl.UInt32)
+                .cum_sum()
+                .over("user")
+                .alias("session")
+            )
+        )
+
+        sessions = (
+            events.group_by(["user", "session"])
+            .agg(
+                pl.col("timestamp").min().alias("session_start"),
+                pl.col("timestamp").max().alias("session_end"),
+                pl.len().cast(pl.UInt32).alias("session_count"),
+                pl.col("open_start").first(),
+                pl.col("open_count").first(),
+            )
+            .with_columns(
+                pl.when(pl.col("session") == 0).then(pl.col("open_start"))
+                .otherwise(pl.col("session_start")).alias("session_start"),
+                pl.when(pl.col("session") == 0).then(pl.col("session_count") + pl.col("open_count"))
+                .otherwise(pl.col("session_count")).alias("session_count"),
+            )
+            .with_columns(
+                (pl.col("session") == pl.col("session").max().over("user")).alias("is_last")
+            )
+        )
+
+        # Every session except the last one of each user is complete
+        finished = [sessions.filter(~pl.col("is_last")).select(list(SESSION_SCHEMA))]
+
+        # Open sessions of users whose next placement came after the gap
+        active_users = batch.select("user").unique()
+        continued_users = sessions.filter(pl.col("session") == 0).select("user")
+        interrupted = (
+            open_sessions.join(active_users, on="user", how="semi")
+            .join(continued_users, on="user", how="anti")
+        )
+        finished.append(as_sessions(interrupted))
+
+        open_sessions = pl.concat([
+            open_sessions.join(active_users, on="user", how="anti"),
+            sessions.filter(pl.col("is_last")).select(
+                "user",
+                pl.col("session_start").alias("open_start"),
+                pl.col("session_end").alias("open_end"),
+                pl.col("session_count").alias("open_count"),
+            ),
+        ])
+
+        # Input is time ordered, so a session idle for longer than the gap can never be extended
+        cutoff = batch["timestamp"].max() - gap
+        finished.append(as_sessions(open_sessions.filter(pl.col("open_end") < cutoff)))
+        open_sessions = open_sessions.filter(pl.col("open_end") >= cutoff)
+
+        yield pl.concat(finished)
+
+    # Whatever is still open when the input ends
+    yield as_sessions(open_sessions)
+
+
+# Session count and average length (over sessions with more than one pixel, as in week3.py)
+def session_metrics(source, start, end, gap=GAP, user_column="user_id", batch_size=BATCH_SIZE):
+    sessions = 0
+    multi_pixel_sessions = 0
+    total_duration = timedelta(0)
+
+    for finished in sessionize(read_batches(source, start, end, user_column, batch_size), gap):
+        sessions += finished.height
+        multi_pixel = finished.filter(pl.col("session_count") > 1)
+        multi_pixel_sessions += multi_pixel.height
+        if multi_pixel.height:
+            total_duration += (multi_pixel["session_end"] - multi_pixel["session_start"]).sum()
+
+    average = total_duration / multi_pixel_sessions if multi_pixel_sessions else timedelta(0)
+    return {
+        "sessions": sessions,
+        "multi_pixel_sessions": multi_pixel_sessions,
+        "average_session_seconds": average.total_seconds(),
+    }
@@ -1,18 +1,30 @@
 import polars as pl
 import sys
 import time
-from datetime import datetime
-from colory.color import Color
+from datetime import datetime, timedelta
+import sessionize
+import first_seen
+import os
+
+# The user bitmap index lives next to the Week 4 scripts
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../Week4"))
+import user_bitmaps
+import create_parquet
+import color_names
 
 # Check for valid args
 if len(sys.argv) < 5:
-    print("Intended use: python3 week1.py YYYY-MM-DD HH YYYY-MM-DD HH")
+    print("Intended use: python3 week3.py YYYY-MM-DD HH YYYY-MM-DD HH [session gap minutes] [memory budget MB]")
     sys.exit()
 
 start_date = sys.argv[1]
 start_hour = sys.argv[2]
 end_date = sys.argv[3]
 end_hour = sys.argv[4]
+# Minutes between placements that start a new session
+gap_minutes = float(sys.argv[5]) if len(sys.argv) > 5 else 15
+# Rough memory budget for the streaming work
+memory_mb = float(sys.argv[6]) if len(sys.argv) > 6 else 1024
 
 # Combine the date and hour into strings
 start_str = start_date + " " + start_hour + ":00:00"  # Format it as YYYY-MM-DD HH:00:00
@@ -23,128 +35,101 @@ if start_str > end_str:
     print("Error: start date is after end date")
     sys.exit()
 
-print('Scanning CSV')
-# Filter by timestamp here
-df = pl.scan_csv('../../../../../Downloads/2022_place_canvas_history.csv').filter(pl.col("timestamp") <= pl.lit(end_str))
-
-print("Converting to parquet")
-df.sink_parquet('output.parquet')
-
-# Read the parquet file
-df = pl.read_parquet('output.parquet')
-
-# Sort data by user_id and timestamp
-df_sorted = df.sort(['user_id', 'timestamp'])
-
-# Remove UTC from the timestamp values
-df_sorted = df_sorted.with_columns(
-    pl.col("timestamp").str.replace(r" UTC$", "")  # Remove the ' UTC' part from the timestamp string
-    .alias("timestamp")
-)
+start = datetime.strptime(start_str, "%Y-%m-%d %H:%M:%S")
+end = datetime.strptime(end_str, "%Y-%m-%d %H:%M:%S")
 
-# Add missing milliseconds to the timestamp if it's missing
-df_sorted = df_sorted.with_columns(
-    pl.when(~pl.col("timestamp").str.contains(r"\."))
-    .then(pl.concat_str([pl.col("timestamp"), pl.lit(".000")]))
-    .otherwise(pl.col("timestamp"))
-    .alias("timestamp")
-)
-
-# Convert timestamp column to datetime format
-df_sorted = df_sorted.with_columns(
-    pl.col("timestamp").str.to_datetime(format="%Y-%m-%d %H:%M:%S%.f").alias("timestamp")
-)
-
-# Filter the DataFrame to include only records within the specified date and time range
-df_time_filtered = df_sorted.filter(pl.col("timestamp") >= datetime.strptime(start_str, "%Y-%m-%d %H:%M:%S"))
+# Polars has no hard memory cap, so the budget sets how many rows each streaming
+# chunk (and each sessionizer batch) holds. About 32 bytes per scanned row, with
+# headroom for every thread holding a few chunks at once.
+batch_rows = max(int(memory_mb * 1024 * 1024 / (32 * 4 * os.cpu_count())), 10_000)
+pl.Config.set_streaming_chunk_size(batch_rows)
 
 # Start measuring execution time
 start_time = time.perf_counter_ns()
 
-# Ranking of colors by distinct users
-color_rank = df_time_filtered.group_by("pixel_color").agg(
-    [
-       pl.n_unique("user_id").alias("distinct_user_count") 
-    ]
-).sort("distinct_user_count", descending=True)
+# One shared lazy frame: typed dataset from ../Week4/create_parquet.py, only the needed
+# columns, filtered by timestamp in the scan so row groups outside the window are skipped
+if create_parquet.hive_exists('../Week4/place_hive'):
+    # Hourly partitions: only the files of the requested hours are opened
+    df_time_filtered = create_parquet.scan_hive(start, end, '../Week4/place_hive').select(["timestamp", "user_id", "pixel_color"])
+else:
+    df_time_filtered = (
+        pl.scan_parquet('../Week4/place.parquet')
+        .select(["timestamp", "user_id", "pixel_color"])
+        .filter(pl.col("timestamp").is_between(start, end))
+    )
 
-print("Ranking of Colors by Distinct Users")
-for idx, item in enumerate(color_rank.iter_rows(), start=1):
-    try:
-        color_name = Color(item[0], 'xkcd').name
-    except ValueError:
-        color_name = item[0]
-    print(f"{idx}. {color_name}: {item[1]} users")
+queries = {}
 
-# Calculate average session length
-# Calculate the time difference (in minutes) between consecutive timestamps within each user
-df_session_length = df_time_filtered.with_columns(
-    pl.col("timestamp")
-    .diff()
-    .over("user_id")
-    .alias("time_diff")
-)
-
-# Create a session column based on time difference
-df_session_length = df_session_length.with_columns(
-    (pl.col("time_diff").is_null() | (pl.col("time_diff") > pl.duration(minutes=15)))
-    .cum_sum()
-    .over("user_id")
-    .alias("session")
-)
-
-# Per user and session, count the number of pixels placed during that session
-df_grouped= df_session_length.group_by(["user_id", "session"]).agg([
-    pl.col("timestamp").count().alias("session_count"),
-    pl.col("timestamp").first().alias("session_start"),
-    pl.col("timestamp").last().alias("session_end"),
-])
-
-# Filter out sessions with only one pixel placed
-valid_sessions = df_grouped.filter(pl.col("session_count") > 1)
-
-# Calculate the session duration
-valid_sessions = valid_sessions.with_columns(
-    (pl.col("session_end") - pl.col("session_start")).alias("session_duration")
-)
-
-# Calculate the average session duration
-print(f"\nAverage session length: {valid_sessions["session_duration"].mean().total_seconds()} seconds")
+# Ranking of colors by distinct users
+if not user_bitmaps.color_index_exists():
+    queries["color_rank"] = df_time_filtered.group_by("pixel_color").agg(
+        [
+           pl.n_unique("user_id").alias("distinct_user_count") 
+        ]
+    ).sort("distinct_user_count", descending=True)
 
 # Pixel placement percentiles
-df_percentiles= df_time_filtered.group_by("user_id").agg([
-    pl.col("timestamp").count().alias("total_pixels_placed")
+df_percentiles = df_time_filtered.group_by("user_id").agg([
+    pl.len().alias("total_pixels_placed")
 ])
 
 # Calculate the 50th, 75th, 90th, and 99th percentiles of total pixels placed per user
-percentiles = df_percentiles.select([
+queries["percentiles"] = df_percentiles.select([
     pl.col("total_pixels_placed").quantile(0.50).alias("50th_percentile"),
     pl.col("total_pixels_placed").quantile(0.75).alias("75th_percentile"),
     pl.col("total_pixels_placed").quantile(0.90).alias("90th_percentile"),
     pl.col("total_pixels_placed").quantile(0.99).alias("99th_percentile"),
 ])
 
-print(percentiles)
+# Count first time users: users whose first placement up to end_str falls after start_str
+if not first_seen.exists():
+    queries["first_time_users"] = (
+        pl.scan_parquet('../Week4/place.parquet')
+        .filter(pl.col("timestamp") <= end)
+        .group_by("user_id")
+        .agg(pl.col("timestamp").min().alias("first_timestamp"))
+        .filter(pl.col("first_timestamp") >= start)
+        .select(pl.len().alias("first_time_users"))
+    )
+
+# Run every remaining query in one go on the streaming engine, sharing the scan
+results = dict(zip(queries, pl.collect_all(list(queries.values()), engine="streaming")))
+
+if user_bitmaps.color_index_exists():
+    # Union of the stored (hour, color) user bitmaps (build them with: python3 ../Week4/user_bitmaps.py)
+    color_rank = user_bitmaps.distinct_users_by_color(start, end)
+else:
+    color_rank = results["color_rank"]
+
+# Color names come from one join against the stored xkcd name table (see ../Week4/color_names.py)
+color_rank = color_names.with_color_names(color_rank)
+
+print("Ranking of Colors by Distinct Users")
+for idx, item in enumerate(color_rank.select("color_name", "distinct_user_count").iter_rows(), start=1):
+    print(f"{idx}. {item[0]}: {item[1]} users")
+
+# Calculate average session length
+# One pass over the timestamp-sorted parquet; only each active user's open session is kept in memory
+session_metrics = sessionize.session_metrics(
+    '../Week4/place.parquet', start, end, gap=timedelta(minutes=gap_minutes), batch_size=batch_rows)
 
-# Count first time users
-df_first_time = df_sorted.with_columns(
-    pl.col("user_id").is_first_distinct().alias("first")
-)
+print(f"\nAverage session length: {session_metrics['average_session_seconds']} seconds")
+print(f"Sessions: {session_metrics['sessions']} ({session_metrics['multi_pixel_sessions']} with more than one pixel)")
 
-df_first_time_filtered = df_first_time.filter(
-    pl.col("timestamp") >= datetime.strptime(start_str, "%Y-%m-%d %H:%M:%S")
-)
+print(results["percentiles"])
 
-# Filter only first-time users
-df_first_time_filtered = df_first_time_filtered.filter(
-    pl.col("first") == "true"
-)
+# Binary searches over the sorted first-placement times (built once with: python3 first_seen.py)
+if first_seen.exists():
+    first_time_users = first_seen.count_new_users(first_seen.load(), start, end)
+else:
+    first_time_users = results["first_time_users"]["first_time_users"][0]
 
-print(f"Count of first time users: {df_first_time_filtered.select(pl.count("first"))}")
+print(f"Count of first time users: {first_time_users}")
 
 # Stop runtime timer
 end_time = time.perf_counter_ns()
 
 execution_time = (end_time - start_time) / 1_000_000
 
-print(f"Runtime: {execution_time}")
\ No newline at end of file
+print(f"Runtime: {execution_time}")
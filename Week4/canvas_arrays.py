@@ -0,0 +1,133 @@
+import os
+import sys
+import time
+import numpy as np
+import polars as pl
+import pyarrow.dataset as ds
+import matplotlib.pyplot as plt
+from matplotlib.colors import LogNorm
+
+# Dense per-pixel arrays for the 2000x2000 canvas, indexed [y, x]:
+#   placements.npy      int32   number of placements
+#   distinct_users.npy  int32   number of different users who placed there
+#   last_color.npy      uint8   color_code of the last placement (255 = never placed)
+#   last_placed.npy     int64   time of the last placement, ms since epoch (-1 = never)
+# Built once from place_encoded.parquet (see encode_ids.py); single pixels only,
+# the moderator rectangles are not counted.
+HERE = os.path.dirname(os.path.abspath(__file__))
+ENCODED_PATH = os.path.join(HERE, 'place_encoded.parquet')
+CANVAS_DIR = os.path.join(HERE, 'canvas')
+
+WIDTH = 2000
+HEIGHT = 2000
+NO_COLOR = 255
+BATCH_SIZE = 1_000_000
+
+# Columns of the canvas handled per pass when counting distinct users
+X_BLOCK = 250
+
+
+def pixel_index(x, y):
+    return y.astype(np.int64) * WIDTH + x.astype(np.int64)
+
+
+# Position of the last occurrence of every distinct value of index
+def last_positions(index):
+    reversed_unique, reversed_first = np.unique(index[::-1], return_index=True)
+    return reversed_unique, len(index) - 1 - reversed_first
+
+
+def build(encoded_path=ENCODED_PATH, canvas_dir=CANVAS_DIR, batch_size=BATCH_SIZE):
+    os.makedirs(canvas_dir, exist_ok=True)
+
+    placements = np.zeros(WIDTH * HEIGHT, dtype=np.int32)
+    last_color = np.full(WIDTH * HEIGHT, NO_COLOR, dtype=np.uint8)
+    last_placed = np.full(WIDTH * HEIGHT, -1, dtype=np.int64)
+
+    # Placements, last color and last time in one pass over the time-sorted rows
+    print("Accumulating placements")
+    scanner = ds.dataset(encoded_path, format="parquet").scanner(
+        columns=["timestamp", "color_code", "x", "y"],
+        filter=ds.field("x2").is_null(),
+        batch_size=batch_size,
+    )
+    for batch in scanner.to_batches():
+        if batch.num_rows == 0:
+            continue
+        index = pixel_index(batch.column("x").to_numpy(), batch.column("y").to_numpy())
+        placements += np.bincount(index, minlength=WIDTH * HEIGHT).astype(np.int32)
+
+        # Rows are sorted by timestamp, so the last row per pixel in this batch is its
+        # latest placement; it replaces the stored one unless that is newer
+        pixels, positions = last_positions(index)
+        placed = batch.column("timestamp").cast("int64").to_numpy()[positions]
+        newer = placed >= last_placed[pixels]
+        last_color[pixels[newer]] = batch.column("color_code").to_numpy()[positions[newer]]
+        last_placed[pixels[newer]] = placed[newer]
+
+    # Distinct users per pixel: unique (pixel, user) pairs one block of columns at a time
+    print("Counting distinct users")
+    distinct_users = np.zeros(WIDTH * HEIGHT, dtype=np.int32)
+    for x_start in range(0, WIDTH, X_BLOCK):
+        pairs = (
+            pl.scan_parquet(encoded_path)
+            .filter(pl.col("x").is_between(x_start, x_start + X_BLOCK - 1) & pl.col("x2").is_null())
+            .select("x", "y", "user_code")
+            .unique()
+            .collect(engine="streaming")
+        )
+        index = pixel_index(pairs["x"].to_numpy(), pairs["y"].to_numpy())
+        distinct_users += np.bincount(index, minlength=WIDTH * HEIGHT).astype(np.int32)
+
+    for name, values in [("placements", placements), ("distinct_users", distinct_users),
+                         ("last_color", last_color), ("last_placed", last_placed)]:
+        np.save(os.path.join(canvas_dir, f"{name}.npy"), values.reshape(HEIGHT, WIDTH))
+
+
+def exists(canvas_dir=CANVAS_DIR):
+    return os.path.exists(os.path.join(canvas_dir, "placements.npy"))
+
+
+def load(name, canvas_dir=CANVAS_DIR):
+    return np.load(os.path.join(canvas_dir, f"{name}.npy"), mmap_mode='r')
+
+
+# The k largest pixels of a [y, x] array as a DataFrame of x, y, value
+def top_k(values, k, value_name="count"):
+    flat = np.asarray(values).ravel()
+    top = np.argpartition(flat, -k)[-k:]
+    top = top[np.argsort(-flat[top], kind="stable")]
+    return pl.DataFrame({
+        "x": (top % WIDTH).astype(np.int16),
+        "y": (top // WIDTH).astype(np.int16),
+        value_name: flat[top],
+    })
+
+
+# Sum over the rectangle x0 <= x <= x1, y0 <= y <= y1
+def region_sum(values, x0, y0, x1, y1):
+    return int(np.asarray(values[y0:y1 + 1, x0:x1 + 1]).sum())
+
+
+def plot_heatmap(values, title, label, log_scale=True):
+    plt.figure(figsize=(10, 10))
+    data = np.asarray(values)
+    norm = LogNorm(vmin=1, vmax=max(int(data.max()), 1)) if log_scale else None
+    heatmap = plt.imshow(np.where(data > 0, data, np.nan) if log_scale else data, cmap='viridis', norm=norm)
+    plt.colorbar(heatmap, label=label)
+    plt.title(title)
+    plt.xlabel('x')
+    plt.ylabel('y')
+    plt.tight_layout()
+    plt.show()
+
+
+if __name__ == "__main__":
+    encoded_path = sys.argv[1] if len(sys.argv) > 1 else ENCODED_PATH
+
+    start_time = time.perf_counter_ns()
+    build(encoded_path)
+    end_time = time.perf_counter_ns()
+
+    print(top_k(load("placements"), 10))
+    print(f"Execution time: {(end_time - start_time) / 1_000_000:.3f} ms")
@@ -0,0 +1,174 @@
+import os
+import sys
+import time
+import numpy as np
+import polars as pl
+import pyarrow.dataset as ds
+from datetime import datetime, timedelta
+
+# Replays the canvas at any moment from place_encoded.parquet (see encode_ids.py).
+# Built once into REPLAY_DIR:
+#   delta_time.bin   int64   placement times in ms since epoch, sorted
+#   delta_index.bin  int32   pixel index y * WIDTH + x
+#   delta_color.bin  uint8   color_code
+#   keyframes.bin    uint8   full canvases, one every KEYFRAME_EVERY deltas
+#   keyframe_rows.npy        number of deltas already applied in each keyframe
+# Moderator rectangles are expanded into one delta per covered pixel.
+# Canvas at T = nearest keyframe before T plus the deltas between them.
+HERE = os.path.dirname(os.path.abspath(__file__))
+ENCODED_PATH = os.path.join(HERE, 'place_encoded.parquet')
+PALETTE_PATH = os.path.join(HERE, 'palette.parquet')
+REPLAY_DIR = os.path.join(HERE, 'replay')
+
+WIDTH = 2000
+HEIGHT = 2000
+NO_COLOR = 255
+KEYFRAME_EVERY = 1_000_000
+BATCH_SIZE = 1_000_000
+
+
+# Pixel index, time and color per delta for one batch, with rectangles expanded in place
+def batch_deltas(batch):
+    x = batch.column("x").to_numpy()
+    y = batch.column("y").to_numpy()
+    times = batch.column("timestamp").cast("int64").to_numpy()
+    colors = batch.column("color_code").to_numpy()
+    index = y.astype(np.int64) * WIDTH + x.astype(np.int64)
+
+    x2 = batch.column("x2").to_numpy(zero_copy_only=False)
+    rectangles = np.flatnonzero(~np.isnan(x2.astype(np.float64)))
+    if len(rectangles) == 0:
+        return index, times, colors
+
+    y2 = batch.column("y2").to_numpy(zero_copy_only=False)
+    parts = []
+    repeats = np.ones(len(index), dtype=np.int64)
+    previous = 0
+    for row in rectangles:
+        parts.append(index[previous:row])
+        xs = np.arange(min(x[row], int(x2[row])), max(x[row], int(x2[row])) + 1, dtype=np.int64)
+        ys = np.arange(min(y[row], int(y2[row])), max(y[row], int(y2[row])) + 1, dtype=np.int64)
+        parts.append((ys[:, None] * WIDTH + xs[None, :]).ravel())
+        repeats[row] = len(xs) * len(ys)
+        previous = row + 1
+    parts.append(index[previous:])
+    return np.concatenate(parts), np.repeat(times, repeats), np.repeat(colors, repeats)
+
+
+# Apply deltas in order; when a pixel is set several times the last one wins
+def apply_deltas(canvas, index, colors):
+    if len(index) == 0:
+        return canvas
+    reversed_unique, reversed_first = np.unique(index[::-1], return_index=True)
+    canvas.reshape(-1)[reversed_unique] = colors[len(index) - 1 - reversed_first]
+    return canvas
+
+
+def build(encoded_path=ENCODED_PATH, replay_dir=REPLAY_DIR, keyframe_every=KEYFRAME_EVERY):
+    os.makedirs(replay_dir, exist_ok=True)
+
+    canvas = np.full((HEIGHT, WIDTH), NO_COLOR, dtype=np.uint8)
+    keyframe_rows = [0]
+    keyframe_times = [np.iinfo(np.int64).min]
+    applied = 0
+
+    files = {name: open(os.path.join(replay_dir, name), 'wb')
+             for name in ["delta_time.bin", "delta_index.bin", "delta_color.bin", "keyframes.bin"]}
+    # Keyframe 0 is the empty canvas
+    files["keyframes.bin"].write(canvas.tobytes())
+
+    scanner = ds.dataset(encoded_path, format="parquet").scanner(
+        columns=["timestamp", "color_code", "x", "y", "x2", "y2"], batch_size=BATCH_SIZE)
+    for batch in scanner.to_batches():
+        if batch.num_rows == 0:
+            continue
+        index, times, colors = batch_deltas(batch)
+        files["delta_time.bin"].write(times.astype(np.int64).tobytes())
+        files["delta_index.bin"].write(index.astype(np.int32).tobytes())
+        files["delta_color.bin"].write(colors.astype(np.uint8).tobytes())
+
+        # Apply the batch, stopping at every keyframe boundary it crosses
+        position = 0
+        while position < len(index):
+            next_keyframe = keyframe_rows[-1] + keyframe_every
+            stop = min(len(index), position + next_keyframe - applied)
+            apply_deltas(canvas, index[position:stop], colors[position:stop])
+            applied += stop - position
+            if applied == next_keyframe:
+                files["keyframes.bin"].write(canvas.tobytes())
+                keyframe_rows.append(applied)
+                keyframe_times.append(int(times[stop - 1]))
+            position = stop
+        print(f"{applied} placements, {len(keyframe_rows)} keyframes")
+
+    for replay_file in files.values():
+        replay_file.close()
+    np.save(os.path.join(replay_dir, "keyframe_rows.npy"), np.array(keyframe_rows, dtype=np.int64))
+    np.save(os.path.join(replay_dir, "keyframe_times.npy"), np.array(keyframe_times, dtype=np.int64))
+
+
+def exists(replay_dir=REPLAY_DIR):
+    return os.path.exists(os.path.join(replay_dir, "keyframe_rows.npy"))
+
+
+def to_ms(timestamp):
+    return int((timestamp - datetime(1970, 1, 1)) / timedelta(milliseconds=1))
+
+
+# Everything is memory-mapped, so opening a replay reads nothing up front
+def load(replay_dir=REPLAY_DIR):
+    keyframe_rows = np.load(os.path.join(replay_dir, "keyframe_rows.npy"))
+    return {
+        "delta_time": np.memmap(os.path.join(replay_dir, "delta_time.bin"), dtype=np.int64, mode='r'),
+        "delta_index": np.memmap(os.path.join(replay_dir, "delta_index.bin"), dtype=np.int32, mode='r'),
+        "delta_color": np.memmap(os.path.join(replay_dir, "delta_color.bin"), dtype=np.uint8, mode='r'),
+        "keyframe_rows": keyframe_rows,
+        "keyframes": np.memmap(os.path.join(replay_dir, "keyframes.bin"), dtype=np.uint8, mode='r',
+                               shape=(len(keyframe_rows), HEIGHT, WIDTH)),
+    }
+
+
+# Number of placements made at or before timestamp
+def rows_until(replay, timestamp):
+    return int(np.searchsorted(replay["delta_time"], to_ms(timestamp), side='right'))
+
+
+# Canvas of color codes as it looked right after every placement up to timestamp
+def canvas_at(replay, timestamp):
+    rows = rows_until(replay, timestamp)
+    keyframe = int(np.searchsorted(replay["keyframe_rows"], rows, side='right')) - 1
+    canvas = np.array(replay["keyframes"][keyframe])
+    start = replay["keyframe_rows"][keyframe]
+    return apply_deltas(canvas, replay["delta_index"][start:rows], replay["delta_color"][start:rows])
+
+
+# Frames for a time-lapse: start from one keyframe, then only apply the deltas between frames
+def frames(replay, start, end, step):
+    canvas = canvas_at(replay, start)
+    rows = rows_until(replay, start)
+    frame_time = start
+    while frame_time <= end:
+        next_rows = rows_until(replay, frame_time)
+        apply_deltas(canvas, replay["delta_index"][rows:next_rows], replay["delta_color"][rows:next_rows])
+        rows = next_rows
+        yield frame_time, canvas.copy()
+        frame_time += step
+
+
+# RGB lookup for color codes, unplaced pixels are white
+def palette_rgb(palette_path=PALETTE_PATH):
+    rgb = np.full((256, 3), 255, dtype=np.uint8)
+    for color_code, pixel_color in pl.read_parquet(palette_path).iter_rows():
+        hex_color = pixel_color.lstrip('#')
+        rgb[color_code] = [int(hex_color[i:i + 2], 16) for i in (0, 2, 4)]
+    return rgb
+
+
+if __name__ == "__main__":
+    encoded_path = sys.argv[1] if len(sys.argv) > 1 else ENCODED_PATH
+
+    start_time = time.perf_counter_ns()
+    build(encoded_path)
+    end_time = time.perf_counter_ns()
+
+    print(f"Execution time: {(end_time - start_time) / 1_000_000:.3f} ms")
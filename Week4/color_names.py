@@ -0,0 +1,93 @@
+import os
+import sys
+import time
+import numpy as np
+import polars as pl
+import colory
+
+# Hex color -> RGB -> nearest xkcd color name, worked out once per distinct color and kept in
+# color_names.parquet, so labeling results is one join instead of a colory lookup per row.
+# The nearest name uses the same "redmean" weighted distance as colory's Color(hex, 'xkcd'),
+# so the names match what the scripts printed before.
+HERE = os.path.dirname(os.path.abspath(__file__))
+TABLE_PATH = os.path.join(HERE, 'color_names.parquet')
+XKCD_PATH = os.path.join(os.path.dirname(colory.__file__), 'xkcd_colors', 'xkcd_colors.csv')
+
+TABLE_SCHEMA = {"pixel_color": pl.String, "red": pl.UInt8, "green": pl.UInt8, "blue": pl.UInt8,
+                "color_name": pl.String}
+
+
+def hex_to_rgb(hex_color):
+    hex_color = hex_color.lstrip('#')  # Remove '#' if present
+    return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+
+
+def xkcd_colors(xkcd_path=XKCD_PATH):
+    names = []
+    rgb = []
+    with open(xkcd_path) as f:
+        for line in f:
+            hex_value, name = line.split(',')
+            names.append(name.strip().title())
+            rgb.append(hex_to_rgb(hex_value.replace('0x', '')))
+    return names, np.array(rgb, dtype=np.float64)
+
+
+# Nearest xkcd name for every color at once: an (n colors x named colors) distance matrix
+def nearest_names(rgb, xkcd_path=XKCD_PATH):
+    names, named_rgb = xkcd_colors(xkcd_path)
+    delta = rgb[:, None, :] - named_rgb[None, :, :]
+    r = (rgb[:, None, 0] + named_rgb[None, :, 0]) / 2
+    distance = (2 + r / 256) * delta[..., 0] ** 2 + 4 * delta[..., 1] ** 2 + (2 + (255 - r) / 256) * delta[..., 2] ** 2
+    return [names[i] for i in distance.argmin(axis=1)]
+
+
+def build_table(hex_colors, xkcd_path=XKCD_PATH):
+    rows = []
+    for hex_color in hex_colors:
+        try:
+            rows.append((hex_color, *hex_to_rgb(hex_color)))
+        except (ValueError, TypeError):
+            # Not a hex color, it keeps its raw value as its label
+            continue
+    if not rows:
+        return pl.DataFrame(schema=TABLE_SCHEMA)
+    rgb = np.array([row[1:] for row in rows], dtype=np.float64)
+    names = nearest_names(rgb, xkcd_path)
+    return pl.DataFrame([(*row, name) for row, name in zip(rows, names)], schema=TABLE_SCHEMA, orient="row")
+
+
+# The stored table, extended (and saved again) with any colors it has not seen yet
+def color_table(hex_colors, table_path=TABLE_PATH):
+    table = pl.read_parquet(table_path) if os.path.exists(table_path) else pl.DataFrame(schema=TABLE_SCHEMA)
+    known = set(table["pixel_color"].to_list())
+    missing = [color for color in set(hex_colors) if color is not None and color not in known]
+    if missing:
+        table = pl.concat([table, build_table(missing)]).sort("pixel_color")
+        table.write_parquet(table_path)
+    return table
+
+
+# Adds color_name next to the hex column; unknown values are labeled with themselves
+def with_color_names(df, column="pixel_color", table_path=TABLE_PATH):
+    df = df.with_columns(pl.col(column).cast(pl.String))
+    table = color_table(df[column].unique().to_list(), table_path)
+    return (
+        df.join(table.select(pl.col("pixel_color").alias(column), "color_name"), on=column, how="left",
+                maintain_order="left")
+        .with_columns(pl.coalesce("color_name", column).alias("color_name"))
+    )
+
+
+if __name__ == "__main__":
+    # Intended use: python3 color_names.py [parquet file with a pixel_color column]
+    parquet_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(HERE, 'place.parquet')
+
+    start_time = time.perf_counter_ns()
+    palette = pl.scan_parquet(parquet_path).select(pl.col("pixel_color").cast(pl.String).unique()).collect()
+    table = color_table(palette["pixel_color"].to_list())
+    end_time = time.perf_counter_ns()
+
+    with pl.Config(tbl_rows=-1):
+        print(table)
+    print(f"Execution time: {(end_time - start_time) / 1_000_000:.3f} ms")
@@ -1,11 +1,118 @@
+import os
 import polars as pl
+import sys
+import time
+from datetime import timedelta
 
-print('Scanning CSV')
-df = pl.scan_csv('../../../../../Downloads/2022_place_canvas_history.csv')
+# Canonical typed copy of the place data that every later script reads:
+#   timestamp      Datetime (ms), time-zone naive holding UTC wall-clock time, rows sorted by it
+#   user_id        UInt64 hash of the original id
+#   pixel_color    Categorical
+#   x, y           Int16 (x2, y2 are only set for the rectangle rows some moderators placed)
+CSV_PATH = '../../../../../Downloads/2022_place_canvas_history.csv'
+PARQUET_PATH = 'place.parquet'
+# The same rows as a Hive-style dataset, one file per event hour: day=YYYY-MM-DD/hour=H/part-0.parquet
+HIVE_DIR = 'place_hive'
+HIVE_SCHEMA = {"day": pl.Date, "hour": pl.Int8}
 
-print("Manipulating user id")
-df = df.with_columns(
-    pl.col("user_id").hash())
+# Rows per row group. With the rows sorted by timestamp each group covers a short
+# time span, so the min/max statistics let range filters skip almost every group
+ROW_GROUP_SIZE = 1_000_000
 
-print("Converting to parquet")
-df.sink_parquet('output.parquet')
\ No newline at end of file
+
+# The anonymization of user_id; verify_hash.py checks this exact expression for collisions
+def hashed_user_id():
+    return pl.col("user_id").hash()
+
+
+# All the string cleanup lives here so downstream scripts never parse timestamps again
+def canonical_placements(csv_path=CSV_PATH):
+    df = pl.scan_csv(csv_path, schema_overrides={"timestamp": pl.String, "user_id": pl.String,
+                                                 "pixel_color": pl.String, "coordinate": pl.String})
+
+    # Remove UTC from the timestamp values
+    df = df.with_columns(
+        pl.col("timestamp").str.replace(r" UTC$", "")
+    )
+
+    # Add missing milliseconds to the timestamp if it's missing, then convert to datetime
+    df = df.with_columns(
+        pl.when(~pl.col("timestamp").str.contains(r"\."))
+        .then(pl.concat_str([pl.col("timestamp"), pl.lit(".000")]))
+        .otherwise(pl.col("timestamp"))
+        .str.to_datetime(format="%Y-%m-%d %H:%M:%S%.f", time_unit="ms")
+        .alias("timestamp")
+    )
+
+    # Split "x,y" (or "x1,y1,x2,y2") into integer columns
+    coordinate = pl.col("coordinate").str.split(",")
+    df = df.select(
+        pl.col("timestamp"),
+        hashed_user_id(),
+        pl.col("pixel_color").cast(pl.Categorical),
+        coordinate.list.get(0).cast(pl.Int16).alias("x"),
+        coordinate.list.get(1).cast(pl.Int16).alias("y"),
+        coordinate.list.get(2, null_on_oob=True).cast(pl.Int16).alias("x2"),
+        coordinate.list.get(3, null_on_oob=True).cast(pl.Int16).alias("y2"),
+    )
+
+    return df.sort("timestamp")
+
+
+# Split the canonical parquet into hourly partitions (about 2M rows, a few tens of MB each).
+# Every hour is its own streaming scan, and the sorted row groups mean it only reads that hour.
+def write_hive(parquet_path=PARQUET_PATH, hive_dir=HIVE_DIR):
+    hours = (
+        pl.scan_parquet(parquet_path)
+        .select(pl.col("timestamp").dt.truncate("1h").unique().sort())
+        .collect(engine="streaming")["timestamp"]
+    )
+    for hour in hours:
+        partition_dir = os.path.join(hive_dir, f"day={hour:%Y-%m-%d}", f"hour={hour.hour}")
+        os.makedirs(partition_dir, exist_ok=True)
+        (
+            pl.scan_parquet(parquet_path)
+            .filter(pl.col("timestamp").is_between(hour, hour + timedelta(hours=1), closed="left"))
+            .sink_parquet(os.path.join(partition_dir, "part-0.parquet"), compression="zstd", statistics=True,
+                          row_group_size=ROW_GROUP_SIZE)
+        )
+
+
+# Partition predicate for start <= timestamp <= end, only on the day/hour keys so it prunes files
+def hive_partition_filter(start, end):
+    after_start = (pl.col("day") > start.date()) | ((pl.col("day") == start.date()) & (pl.col("hour") >= start.hour))
+    before_end = (pl.col("day") < end.date()) | ((pl.col("day") == end.date()) & (pl.col("hour") <= end.hour))
+    return after_start & before_end
+
+
+def hive_exists(hive_dir=HIVE_DIR):
+    return os.path.isdir(hive_dir)
+
+
+# Placements with start <= timestamp <= end, reading only the partitions of those hours
+def scan_hive(start, end, hive_dir=HIVE_DIR):
+    return (
+        pl.scan_parquet(os.path.join(hive_dir, "**", "*.parquet"), hive_partitioning=True, hive_schema=HIVE_SCHEMA)
+        .filter(hive_partition_filter(start, end))
+        .filter(pl.col("timestamp").is_between(start, end))
+        .drop("day", "hour")
+    )
+
+
+if __name__ == "__main__":
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else CSV_PATH
+    parquet_path = sys.argv[2] if len(sys.argv) > 2 else PARQUET_PATH
+
+    start_time = time.perf_counter_ns()
+
+    print('Scanning CSV')
+    df = canonical_placements(csv_path)
+
+    print("Converting to parquet")
+    df.sink_parquet(parquet_path, compression="zstd", statistics=True, row_group_size=ROW_GROUP_SIZE)
+
+    print("Writing hourly partitions")
+    write_hive(parquet_path)
+
+    end_time = time.perf_counter_ns()
+    print(f"Execution time: {(end_time - start_time) / 1_000_000:.3f} ms")
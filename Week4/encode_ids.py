@@ -0,0 +1,89 @@
+import polars as pl
+import sys
+import time
+
+# Dense integer codes for the two high-volume key columns of place.parquet:
+#   user_code   UInt32, numbered 0..n-1 in order of each user's first placement
+#   color_code  UInt8, index into the sorted palette
+# The lookup tables are kept next to the encoded data so results can be decoded.
+PARQUET_PATH = 'place.parquet'
+ENCODED_PATH = 'place_encoded.parquet'
+USERS_PATH = 'users.parquet'
+PALETTE_PATH = 'palette.parquet'
+
+ROW_GROUP_SIZE = 1_000_000
+
+
+def build_users(df):
+    return (
+        df.group_by("user_id")
+        .agg(pl.col("timestamp").min().alias("first_timestamp"))
+        .sort(["first_timestamp", "user_id"])
+        .with_row_index("user_code")
+        .select(pl.col("user_code").cast(pl.UInt32), "user_id", "first_timestamp")
+        .collect(engine="streaming")
+    )
+
+
+def build_palette(df):
+    colors = df.select(pl.col("pixel_color").cast(pl.String).unique().sort()).collect(engine="streaming")
+    # Checked before the cast, which would fail on its own above 256 colors
+    if colors.height > 256:
+        raise ValueError(f"{colors.height} colors do not fit in a UInt8 code")
+    return colors.with_row_index("color_code").select(pl.col("color_code").cast(pl.UInt8), "pixel_color")
+
+
+def encode(parquet_path=PARQUET_PATH, encoded_path=ENCODED_PATH, users_path=USERS_PATH, palette_path=PALETTE_PATH):
+    df = pl.scan_parquet(parquet_path)
+
+    # Palette first, so nothing is written when the colors do not fit in a UInt8
+    print("Numbering palette")
+    palette = build_palette(df)
+
+    print("Numbering users")
+    users = build_users(df)
+
+    palette.write_parquet(palette_path)
+    users.write_parquet(users_path)
+
+    print("Encoding placements")
+    color_codes = dict(zip(palette["pixel_color"], palette["color_code"]))
+    encoded = (
+        df.join(users.lazy().select("user_id", "user_code"), on="user_id", how="left", maintain_order="left")
+        .select(
+            "timestamp",
+            "user_code",
+            pl.col("pixel_color").cast(pl.String).replace_strict(color_codes, return_dtype=pl.UInt8).alias("color_code"),
+            "x", "y", "x2", "y2",
+        )
+    )
+    encoded.sink_parquet(encoded_path, compression="zstd", statistics=True, row_group_size=ROW_GROUP_SIZE)
+
+
+# Turn user_code / color_code columns of a (small) result back into the original values
+def decode_users(df, users_path=USERS_PATH):
+    return df.join(pl.read_parquet(users_path, columns=["user_code", "user_id"]), on="user_code", how="left")
+
+
+def decode_colors(df, palette_path=PALETTE_PATH):
+    return df.join(pl.read_parquet(palette_path), on="color_code", how="left")
+
+
+# Codes for a list of hex colors, e.g. to filter encoded data with is_in
+def color_codes_for(hex_colors, palette_path=PALETTE_PATH):
+    palette = pl.read_parquet(palette_path)
+    return palette.filter(pl.col("pixel_color").is_in(hex_colors))["color_code"].to_list()
+
+
+if __name__ == "__main__":
+    parquet_path = sys.argv[1] if len(sys.argv) > 1 else PARQUET_PATH
+
+    start_time = time.perf_counter_ns()
+    try:
+        encode(parquet_path)
+    except ValueError as error:
+        print(f"Error: {error}")
+        sys.exit(1)
+    end_time = time.perf_counter_ns()
+
+    print(f"Execution time: {(end_time - start_time) / 1_000_000:.3f} ms")
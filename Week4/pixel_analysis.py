@@ -1,50 +1,62 @@
 import polars as pl
-from datetime import datetime
+from datetime import datetime, timedelta
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas
-from colory.color import Color
+import user_bitmaps
+import canvas_arrays
+import canvas_replay
+import time_cube
+import color_names
 
 print("Reading parquet file")
-df = pl.read_parquet('output.parquet')
-
-# Remove UTC from the timestamp values
-print("Normalizing timestamp column")
-df = df.with_columns(
-    pl.col("timestamp").str.replace(r" UTC$", "")  # Remove the ' UTC' part from the timestamp string
-    .alias("timestamp")
-)
-
-# Add missing milliseconds to the timestamp if it's missing
-df = df.with_columns(
-    pl.when(~pl.col("timestamp").str.contains(r"\."))
-    .then(pl.concat_str([pl.col("timestamp"), pl.lit(".000")]))
-    .otherwise(pl.col("timestamp"))
-    .alias("timestamp")
-)
-
-# Convert timestamp column to datetime format
-df = df.with_columns(
-    pl.col("timestamp").str.to_datetime(format="%Y-%m-%d %H:%M:%S%.f").alias("timestamp")
-)
-
-# Find the top 3 coordinates
-most_common_coord = df.select(pl.col('coordinate').value_counts(sort=True)).unnest('coordinate').head(3)
+# Canonical dataset from create_parquet.py: timestamps are already datetimes
+df = pl.read_parquet('place.parquet')
+
+# Find the top 3 coordinates (single pixels only, not the moderator rectangles)
+df_pixels = df.filter(pl.col("x2").is_null())
+if canvas_arrays.exists():
+    # Read straight off the per-pixel placement counts (build them with: python3 canvas_arrays.py)
+    placements = canvas_arrays.load("placements")
+    most_common_coord = canvas_arrays.top_k(placements, 3).with_columns(pl.col("count").cast(pl.UInt32))
+    canvas_arrays.plot_heatmap(placements, "Placements per Pixel", "Number of Placements")
+else:
+    most_common_coord = (
+        df_pixels.group_by(["x", "y"])
+        .agg(pl.len().alias("count"))
+        .sort("count", descending=True)
+        .head(3)
+    )
 print(most_common_coord)
 
 # Results: (0,0) with 98,807 placements, (359,564) with 69,198 placements, and (349, 564) with 55,230
 
 # 1. WHY are these pixels getting so many hits? Who is responsible for painting these pixels?
-df_top = df.filter(pl.col("coordinate").is_in(most_common_coord['coordinate'].to_list()))
+# Only label the few rows at the top coordinates with an "x,y" string for grouping and plots
+df_top = df_pixels.join(most_common_coord.select(["x", "y"]), on=["x", "y"]).with_columns(
+    pl.format("{},{}", "x", "y").alias("coordinate")
+)
 
 most_common_users = df_top.select(pl.col('user_id').value_counts(sort=True)).unnest('user_id')
 print(most_common_users)
 
 # Group by coordinate and count unique users per coordinate
-unique_users_per_coord = (
-    df_top.group_by("coordinate")
-    .agg(pl.col("user_id").n_unique().alias("unique_users"))
-)
+if user_bitmaps.coord_index_exists():
+    # Cardinality of the stored per-pixel user bitmaps (build them with: python3 user_bitmaps.py)
+    top_coords = most_common_coord.select(["x", "y"]).rows()
+    top_bitmaps = user_bitmaps.coord_bitmaps(top_coords)
+    unique_users_per_coord = pl.DataFrame(
+        [(f"{x},{y}", len(users)) for (x, y), users in top_bitmaps.items()],
+        schema=["coordinate", "unique_users"],
+        orient="row",
+    )
+    print(f"Unique users across the top coordinates: {len(user_bitmaps.users_in_any(top_coords))}")
+    print(f"Users who painted all of the top coordinates: {len(user_bitmaps.users_in_all(top_coords))}")
+else:
+    unique_users_per_coord = (
+        df_top.group_by("coordinate")
+        .agg(pl.col("user_id").n_unique().alias("unique_users"))
+    )
 
 # Convert to a Pandas DataFrame for plotting
 unique_users_pd = unique_users_per_coord.to_pandas()
@@ -92,45 +104,54 @@ print(dist_sum)
 # (0,0) had user 9117946461022715619 paint 50 times.
 
 # 3. WHY were these pixels specifically targeted by these users, and what motivations influenced this choice?
-result = (
-    df_top
-    .with_columns(
-        pl.col("timestamp").dt.truncate("1h").alias("hour_interval")
+if time_cube.exists("1h", 1):
+    # Slice the hour x pixel cube for the top coordinates (build it with: python3 time_cube.py 1h 1)
+    cube, hour_starts = time_cube.load("1h", 1)
+    top_coords = most_common_coord.select(["x", "y"]).rows()
+    paints, hour_starts = time_cube.active_buckets(time_cube.coordinate_series(cube, top_coords), hour_starts)
+    print(paints)
+    time_cube.plot_heatmap(paints, hour_starts, [f"{x},{y}" for x, y in top_coords],
+                           'Heatmap of Placements Over Hourly Intervals', xlabel='Hour Interval')
+else:
+    result = (
+        df_top
+        .with_columns(
+            pl.col("timestamp").dt.truncate("1h").alias("hour_interval")
+        )
+        .group_by(["coordinate", "hour_interval"])
+        .agg(pl.len().alias("paints_in_interval"))
+        .sort(["paints_in_interval"], descending=True)
     )
-    .group_by(["coordinate", "hour_interval"])
-    .agg(pl.len().alias("paints_in_interval"))
-    .sort(["paints_in_interval"], descending=True)
-)
-print(result)
+    print(result)
 
-# Convert the Polars DataFrame to a Pandas DataFrame
-result_pd = result.to_pandas()
+    # Convert the Polars DataFrame to a Pandas DataFrame
+    result_pd = result.to_pandas()
 
-# Create a pivot table with coordinates as rows and hour intervals as columns
-pivot_table = result_pd.pivot(index="coordinate", columns="hour_interval", values="paints_in_interval")
-# Replace NaN with 0 for plotting purposes
-pivot_table = pivot_table.fillna(0)
+    # Create a pivot table with coordinates as rows and hour intervals as columns
+    pivot_table = result_pd.pivot(index="coordinate", columns="hour_interval", values="paints_in_interval")
+    # Replace NaN with 0 for plotting purposes
+    pivot_table = pivot_table.fillna(0)
 
-# Plotting the heatmap
-plt.figure(figsize=(12, 8))
-heatmap = plt.imshow(pivot_table, cmap='viridis', aspect='auto')
+    # Plotting the heatmap
+    plt.figure(figsize=(12, 8))
+    heatmap = plt.imshow(pivot_table, cmap='viridis', aspect='auto')
 
-# Create a colorbar with label
-plt.colorbar(heatmap, label='Number of Paints')
+    # Create a colorbar with label
+    plt.colorbar(heatmap, label='Number of Paints')
 
-# Set x-tick labels using the hour intervals
-# Convert the hour intervals to strings for clarity (assuming they are datetime objects)
-x_labels = [col.strftime('%Y-%m-%d %H:%M') if hasattr(col, 'strftime') else str(col) for col in pivot_table.columns]
-plt.xticks(ticks=np.arange(len(pivot_table.columns)), labels=x_labels, rotation=45)
+    # Set x-tick labels using the hour intervals
+    # Convert the hour intervals to strings for clarity (assuming they are datetime objects)
+    x_labels = [col.strftime('%Y-%m-%d %H:%M') if hasattr(col, 'strftime') else str(col) for col in pivot_table.columns]
+    plt.xticks(ticks=np.arange(len(pivot_table.columns)), labels=x_labels, rotation=45)
 
-# Set y-tick labels using the coordinates
-plt.yticks(ticks=np.arange(len(pivot_table.index)), labels=pivot_table.index)
+    # Set y-tick labels using the coordinates
+    plt.yticks(ticks=np.arange(len(pivot_table.index)), labels=pivot_table.index)
 
-plt.xlabel('Hour Interval')
-plt.ylabel('Coordinate')
-plt.title('Heatmap of Placements Over Hourly Intervals')
-plt.tight_layout()
-plt.show()
+    plt.xlabel('Hour Interval')
+    plt.ylabel('Coordinate')
+    plt.title('Heatmap of Placements Over Hourly Intervals')
+    plt.tight_layout()
+    plt.show()
 
 # Result: Pixels are being placed the most the evening of April 4th and the early morning of April 5th at the coordinate (0,0).
 
@@ -156,12 +177,21 @@ df_filtered = df_top.select(
 
 print(df_filtered)
 
-# Use a list comprehension to map hex color codes to their English names using colory
-color_names = [Color(hex_val['pixel_color'], 'xkcd').name for hex_val in df_filtered["pixel_color"]]
-
-# Add the color names as a new column
-df_filtered = df_filtered.with_columns(pl.Series("color_name", color_names))
+# Add the English color names with one join against the stored xkcd name table
+df_filtered = color_names.with_color_names(df_filtered.unnest("pixel_color"))
 
 print(df_filtered)
 
-# Result: White was placed 27,830 times at (0,0) and was the only color placed during that timeframe.
\ No newline at end of file
+# Result: White was placed 27,830 times at (0,0) and was the only color placed during that timeframe.
+
+# The whole canvas just before and at the end of that last hour (build the replay with: python3 canvas_replay.py)
+if canvas_replay.exists():
+    replay = canvas_replay.load()
+    rgb = canvas_replay.palette_rgb()
+    for frame_time, canvas in canvas_replay.frames(replay, threshold_datetime, datetime(2022, 4, 5, 1, 0, 0), timedelta(hours=1)):
+        print(f"{frame_time}: (0,0) is color_code {canvas[0, 0]}")
+        plt.figure(figsize=(10, 10))
+        plt.imshow(rgb[canvas])
+        plt.title(f"Canvas at {frame_time}")
+        plt.axis('off')
+        plt.show()
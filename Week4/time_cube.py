@@ -0,0 +1,155 @@
+import os
+import sys
+import time
+import numpy as np
+import polars as pl
+import pyarrow.dataset as ds
+import matplotlib.pyplot as plt
+
+# Placement counts per time bucket and canvas tile, built once from place_encoded.parquet:
+#   cube_<bucket>_<tile>.npy          int32 [bucket, tile_y, tile_x]
+#   cube_<bucket>_<tile>_starts.npy   int64 start of every bucket, ms since epoch
+# A tile is a tile x tile block of pixels, so tile 1 keeps single coordinates.
+# The cube takes buckets * (2000 / tile)^2 * 4 bytes on disk, e.g. about 1.4 GB for
+# 1h buckets of single pixels, and is memory-mapped so a heatmap only reads its slice.
+# build() refuses cubes above MAX_CUBE_BYTES (1m buckets of single pixels would be about
+# 80 GB) unless it is given a larger max_bytes.
+# Single pixels only, the moderator rectangles are not counted (same as canvas_arrays.py).
+HERE = os.path.dirname(os.path.abspath(__file__))
+ENCODED_PATH = os.path.join(HERE, 'place_encoded.parquet')
+CUBE_DIR = os.path.join(HERE, 'cube')
+
+WIDTH = 2000
+HEIGHT = 2000
+BATCH_SIZE = 1_000_000
+MAX_CUBE_BYTES = 4 * 1024**3
+
+# Bucket widths in milliseconds, aligned to the epoch like dt.truncate
+BUCKETS = {"1m": 60_000, "10m": 600_000, "1h": 3_600_000}
+
+
+def cube_path(bucket, tile, cube_dir=CUBE_DIR):
+    return os.path.join(cube_dir, f"cube_{bucket}_{tile}.npy")
+
+
+def starts_path(bucket, tile, cube_dir=CUBE_DIR):
+    return os.path.join(cube_dir, f"cube_{bucket}_{tile}_starts.npy")
+
+
+def build(bucket="1h", tile=1, encoded_path=ENCODED_PATH, cube_dir=CUBE_DIR, batch_size=BATCH_SIZE,
+          max_bytes=MAX_CUBE_BYTES):
+    if WIDTH % tile or HEIGHT % tile:
+        raise ValueError(f"tile must divide the {WIDTH}x{HEIGHT} canvas")
+    bucket_ms = BUCKETS[bucket]
+    tiles_x = WIDTH // tile
+    tiles_y = HEIGHT // tile
+    cells = tiles_x * tiles_y
+
+    # Event bounds come from the parquet statistics
+    bounds = pl.scan_parquet(encoded_path).select(
+        pl.col("timestamp").min().dt.epoch("ms").alias("first"),
+        pl.col("timestamp").max().dt.epoch("ms").alias("last"),
+    ).collect()
+    first_bucket = bounds["first"][0] // bucket_ms
+    buckets = bounds["last"][0] // bucket_ms - first_bucket + 1
+
+    cube_bytes = buckets * cells * np.dtype(np.int32).itemsize
+    if cube_bytes > max_bytes:
+        raise ValueError(f"a {bucket} x tile {tile} cube takes {cube_bytes / 1024**3:.1f} GB, above the "
+                         f"{max_bytes / 1024**3:.1f} GB limit; use longer buckets, larger tiles or a larger max_bytes")
+
+    os.makedirs(cube_dir, exist_ok=True)
+    cube = np.lib.format.open_memmap(cube_path(bucket, tile, cube_dir), mode='w+', dtype=np.int32,
+                                     shape=(buckets, tiles_y, tiles_x))
+    flat_cube = cube.reshape(-1)
+
+    scanner = ds.dataset(encoded_path, format="parquet").scanner(
+        columns=["timestamp", "x", "y"],
+        filter=ds.field("x2").is_null(),
+        batch_size=batch_size,
+    )
+    for batch in scanner.to_batches():
+        if batch.num_rows == 0:
+            continue
+        bucket_index = batch.column("timestamp").cast("int64").to_numpy() // bucket_ms - first_bucket
+        x = batch.column("x").to_numpy().astype(np.int64) // tile
+        y = batch.column("y").to_numpy().astype(np.int64) // tile
+        cell = bucket_index * cells + y * tiles_x + x
+
+        # Rows are sorted by timestamp, so a batch only touches a short run of buckets
+        low = int(cell.min())
+        high = int(cell.max()) + 1
+        flat_cube[low:high] += np.bincount(cell - low, minlength=high - low).astype(np.int32)
+
+    cube.flush()
+    np.save(starts_path(bucket, tile, cube_dir), (first_bucket + np.arange(buckets)) * bucket_ms)
+
+
+def exists(bucket="1h", tile=1, cube_dir=CUBE_DIR):
+    return os.path.exists(starts_path(bucket, tile, cube_dir))
+
+
+# The cube (memory-mapped) and the bucket start times as datetimes
+def load(bucket="1h", tile=1, cube_dir=CUBE_DIR):
+    cube = np.load(cube_path(bucket, tile, cube_dir), mmap_mode='r')
+    starts = np.load(starts_path(bucket, tile, cube_dir)).astype("datetime64[ms]")
+    return cube, starts
+
+
+# One row of counts per coordinate, [coordinate, bucket]; coordinates are mapped to their tile
+def coordinate_series(cube, coords):
+    tile = WIDTH // cube.shape[2]
+    xs = np.array([x for x, y in coords]) // tile
+    ys = np.array([y for x, y in coords]) // tile
+    return np.asarray(cube[:, ys, xs]).T
+
+
+# Counts per bucket for the tiles covering x0 <= x <= x1, y0 <= y <= y1
+def region_series(cube, x0, y0, x1, y1):
+    tile = WIDTH // cube.shape[2]
+    region = cube[:, y0 // tile:y1 // tile + 1, x0 // tile:x1 // tile + 1]
+    return np.asarray(region).sum(axis=(1, 2), dtype=np.int64)
+
+
+# Only the buckets where any of the rows has a placement, like a pivot over the placements
+def active_buckets(values, starts):
+    active = np.flatnonzero(np.asarray(values).sum(axis=0) > 0)
+    return values[:, active], starts[active]
+
+
+def plot_heatmap(values, starts, row_labels, title, xlabel='Time Bucket', ylabel='Coordinate'):
+    plt.figure(figsize=(12, 8))
+    heatmap = plt.imshow(values, cmap='viridis', aspect='auto')
+    plt.colorbar(heatmap, label='Number of Paints')
+    x_labels = [str(start)[:16].replace('T', ' ') for start in starts]
+    plt.xticks(ticks=np.arange(len(starts)), labels=x_labels, rotation=45)
+    plt.yticks(ticks=np.arange(len(row_labels)), labels=row_labels)
+    plt.xlabel(xlabel)
+    plt.ylabel(ylabel)
+    plt.title(title)
+    plt.tight_layout()
+    plt.show()
+
+
+if __name__ == "__main__":
+    # Intended use: python3 time_cube.py [bucket: 1m, 10m or 1h] [tile size] [encoded parquet] [max GB]
+    bucket = sys.argv[1] if len(sys.argv) > 1 else "1h"
+    tile = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    encoded_path = sys.argv[3] if len(sys.argv) > 3 else ENCODED_PATH
+    max_bytes = int(float(sys.argv[4]) * 1024**3) if len(sys.argv) > 4 else MAX_CUBE_BYTES
+
+    if bucket not in BUCKETS:
+        print(f"Error: bucket must be one of {', '.join(BUCKETS)}")
+        sys.exit()
+
+    start_time = time.perf_counter_ns()
+    try:
+        build(bucket, tile, encoded_path, max_bytes=max_bytes)
+    except ValueError as error:
+        print(f"Error: {error}")
+        sys.exit(1)
+    end_time = time.perf_counter_ns()
+
+    cube, starts = load(bucket, tile)
+    print(f"Cube {cube.shape[0]} buckets x {cube.shape[1]} x {cube.shape[2]} tiles, {int(cube.sum())} placements")
+    print(f"Execution time: {(end_time - start_time) / 1_000_000:.3f} ms")
@@ -0,0 +1,156 @@
+import os
+import sys
+import time
+import polars as pl
+from datetime import timedelta
+from pyroaring import BitMap
+
+# Compressed sets of user codes (see encode_ids.py), built once from place_encoded.parquet:
+#   color_bitmaps.parquet   hour, color_code, users   (users who placed that color in that hour)
+#   coord_bitmaps/*.parquet x, y, users               (users who ever painted that pixel)
+# Distinct-user counts then become bitmap unions instead of n_unique over the rows.
+HERE = os.path.dirname(os.path.abspath(__file__))
+ENCODED_PATH = os.path.join(HERE, 'place_encoded.parquet')
+PALETTE_PATH = os.path.join(HERE, 'palette.parquet')
+COLOR_BITMAPS_PATH = os.path.join(HERE, 'color_bitmaps.parquet')
+COORD_BITMAPS_DIR = os.path.join(HERE, 'coord_bitmaps')
+
+ONE_HOUR = timedelta(hours=1)
+
+# Columns of the canvas grouped per pass when building the coordinate bitmaps
+X_BLOCK = 250
+CANVAS_WIDTH = 2000
+
+
+def to_bitmaps(groups, key_columns):
+    rows = [(*row[:-1], BitMap(row[-1]).serialize()) for row in groups.iter_rows()]
+    schema = {column: groups.schema[column] for column in key_columns}
+    schema["users"] = pl.Binary
+    return pl.DataFrame(rows, schema=schema, orient="row")
+
+
+def build_color_bitmaps(encoded_path=ENCODED_PATH, color_bitmaps_path=COLOR_BITMAPS_PATH):
+    groups = (
+        pl.scan_parquet(encoded_path)
+        .group_by(pl.col("timestamp").dt.truncate("1h").alias("hour"), "color_code")
+        .agg(pl.col("user_code").unique().alias("users"))
+        .sort(["hour", "color_code"])
+        .collect(engine="streaming")
+    )
+    to_bitmaps(groups, ["hour", "color_code"]).write_parquet(color_bitmaps_path)
+
+
+def build_coord_bitmaps(encoded_path=ENCODED_PATH, coord_bitmaps_dir=COORD_BITMAPS_DIR):
+    os.makedirs(coord_bitmaps_dir, exist_ok=True)
+    for x_start in range(0, CANVAS_WIDTH, X_BLOCK):
+        print(f"Coordinates x = {x_start}..{x_start + X_BLOCK - 1}")
+        groups = (
+            pl.scan_parquet(encoded_path)
+            # Single pixels only, the moderator rectangles are not one coordinate
+            .filter(pl.col("x").is_between(x_start, x_start + X_BLOCK - 1) & pl.col("x2").is_null())
+            .group_by("x", "y")
+            .agg(pl.col("user_code").unique().alias("users"))
+            .sort(["x", "y"])
+            .collect(engine="streaming")
+        )
+        to_bitmaps(groups, ["x", "y"]).write_parquet(os.path.join(coord_bitmaps_dir, f"part-{x_start:04d}.parquet"))
+
+
+def color_index_exists(color_bitmaps_path=COLOR_BITMAPS_PATH):
+    return os.path.exists(color_bitmaps_path)
+
+
+def coord_index_exists(coord_bitmaps_dir=COORD_BITMAPS_DIR):
+    return os.path.isdir(coord_bitmaps_dir) and len(os.listdir(coord_bitmaps_dir)) > 0
+
+
+# Exact per-color user sets for start <= timestamp <= end: stored bitmaps for the
+# whole hours inside the window, plus the raw rows of the partial hours at the edges
+def color_bitmaps(start, end, encoded_path=ENCODED_PATH, color_bitmaps_path=COLOR_BITMAPS_PATH):
+    full_start = start.replace(minute=0, second=0, microsecond=0)
+    if full_start < start:
+        full_start += ONE_HOUR
+    full_end = end.replace(minute=0, second=0, microsecond=0)
+
+    users_by_color = {}
+
+    if full_start < full_end:
+        stored = (
+            pl.scan_parquet(color_bitmaps_path)
+            .filter((pl.col("hour") >= full_start) & (pl.col("hour") < full_end))
+            .collect()
+        )
+        for color_code, users in stored.select("color_code", "users").iter_rows():
+            users_by_color.setdefault(color_code, BitMap()).update(BitMap.deserialize(users))
+        edges = [(start, full_start, "left"), (full_end, end, "both")]
+    else:
+        # Window shorter than the gap between two hour marks: scan all of it
+        edges = [(start, end, "both")]
+
+    encoded = pl.scan_parquet(encoded_path)
+    edge_rows = pl.concat([
+        encoded.filter(pl.col("timestamp").is_between(edge_start, edge_end, closed=closed))
+        for edge_start, edge_end, closed in edges
+    ])
+    edge_groups = (
+        edge_rows.group_by("color_code")
+        .agg(pl.col("user_code").unique().alias("users"))
+        .collect()
+    )
+    for color_code, users in edge_groups.iter_rows():
+        users_by_color.setdefault(color_code, BitMap()).update(users)
+
+    return users_by_color
+
+
+# Same shape as the n_unique ranking in week3.py
+def distinct_users_by_color(start, end, encoded_path=ENCODED_PATH, color_bitmaps_path=COLOR_BITMAPS_PATH,
+                            palette_path=PALETTE_PATH):
+    users_by_color = color_bitmaps(start, end, encoded_path, color_bitmaps_path)
+    counts = pl.DataFrame(
+        [(color_code, len(users)) for color_code, users in users_by_color.items()],
+        schema={"color_code": pl.UInt8, "distinct_user_count": pl.UInt32},
+        orient="row",
+    )
+    return (
+        counts.join(pl.read_parquet(palette_path), on="color_code", how="left")
+        .select("pixel_color", "distinct_user_count")
+        .sort("distinct_user_count", descending=True)
+    )
+
+
+# {(x, y): BitMap} for the requested coordinates
+def coord_bitmaps(coords, coord_bitmaps_dir=COORD_BITMAPS_DIR):
+    wanted = pl.DataFrame(coords, schema={"x": pl.Int16, "y": pl.Int16}, orient="row")
+    stored = (
+        pl.scan_parquet(os.path.join(coord_bitmaps_dir, "*.parquet"))
+        .join(wanted.lazy(), on=["x", "y"], how="semi")
+        .collect()
+    )
+    return {(x, y): BitMap.deserialize(users) for x, y, users in stored.iter_rows()}
+
+
+# Users who painted any of the coordinates
+def users_in_any(coords, coord_bitmaps_dir=COORD_BITMAPS_DIR):
+    return BitMap.union(BitMap(), *coord_bitmaps(coords, coord_bitmaps_dir).values())
+
+
+# Users who painted every one of the coordinates, e.g. both (0,0) and (359,564)
+def users_in_all(coords, coord_bitmaps_dir=COORD_BITMAPS_DIR):
+    bitmaps = coord_bitmaps(coords, coord_bitmaps_dir)
+    if len(bitmaps) < len(set(coords)):
+        return BitMap()
+    return BitMap.intersection(*bitmaps.values())
+
+
+if __name__ == "__main__":
+    encoded_path = sys.argv[1] if len(sys.argv) > 1 else ENCODED_PATH
+
+    start_time = time.perf_counter_ns()
+    print("Building hour x color bitmaps")
+    build_color_bitmaps(encoded_path)
+    print("Building coordinate bitmaps")
+    build_coord_bitmaps(encoded_path)
+    end_time = time.perf_counter_ns()
+
+    print(f"Execution time: {(end_time - start_time) / 1_000_000:.3f} ms")
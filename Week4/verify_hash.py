@@ -1,15 +1,107 @@
+import os
+import sys
+import time
+import tempfile
 import polars as pl
+import pyarrow.csv as pv
+import pyarrow.parquet as pq
+from create_parquet import CSV_PATH, hashed_user_id
 
-print('Reading CSV')
-df = pl.read_csv('../../../../../Downloads/2022_place_canvas_history.csv', columns=['user_id', 'timestamp']).filter(pl.col("timestamp") <= pl.lit("2022-04-03 06:00:00"))
+# Checks that the user_id hash in create_parquet.py keeps every user distinct, over all rows.
+# Pass 1 streams the CSV and spills the distinct (user_id, hash) pairs of each block into
+# one file per hash prefix. Ids that collide share a hash, so they always land in the same
+# partition, and pass 2 can check each partition on its own with an exact in-memory group_by.
 
-print("Counting unique user IDs")
-result = df.select(pl.n_unique("user_id"))
-print(result)
+# Number of hash-prefix partitions, rounded up to a power of two
+PARTITIONS = 64
+BLOCK_SIZE = 64 * 1024 * 1024
 
-print("Manipulating user id")
-df = df.with_columns(
-    pl.col("user_id").hash())
 
-result = df.select(pl.n_unique("user_id"))
-print(result)
\ No newline at end of file
+def spill_partitions(csv_path, spill_dir, partitions):
+    # Keep the top bits of the 64-bit hash as the partition number (no bits for one partition,
+    # where the divisor would be 2**64 and not fit in a UInt64)
+    bits = (partitions - 1).bit_length()
+    if bits == 0:
+        partition_expr = pl.lit(0, dtype=pl.UInt64)
+    else:
+        partition_expr = pl.col("hash") // pl.lit(1 << (64 - bits), dtype=pl.UInt64)
+    writers = {}
+    rows = 0
+
+    reader = pv.open_csv(
+        csv_path,
+        read_options=pv.ReadOptions(block_size=BLOCK_SIZE),
+        convert_options=pv.ConvertOptions(include_columns=["user_id"]),
+    )
+    for batch in reader:
+        rows += batch.num_rows
+        pairs = (
+            pl.from_arrow(batch)
+            .select(pl.col("user_id").cast(pl.String))
+            .unique()
+            .with_columns(hashed_user_id().alias("hash"))
+            .with_columns(partition_expr.alias("partition"))
+        )
+        for (partition_number,), part in pairs.partition_by("partition", as_dict=True, include_key=False).items():
+            table = part.to_arrow()
+            if partition_number not in writers:
+                writers[partition_number] = pq.ParquetWriter(
+                    os.path.join(spill_dir, f"part-{partition_number:04d}.parquet"), table.schema)
+            writers[partition_number].write_table(table)
+        print(f"{rows} rows read")
+
+    for writer in writers.values():
+        writer.close()
+    return rows
+
+
+# Distinct users, distinct hashes and every hash shared by more than one user_id
+def check_partition(path):
+    pairs = pl.read_parquet(path).unique()
+    collisions = (
+        pairs.group_by("hash")
+        .agg(pl.col("user_id").sort().alias("user_ids"))
+        .filter(pl.col("user_ids").list.len() > 1)
+    )
+    return pairs.height, pairs["hash"].n_unique(), collisions
+
+
+def verify(csv_path=CSV_PATH, partitions=PARTITIONS):
+    users = 0
+    hashes = 0
+    collisions = []
+    with tempfile.TemporaryDirectory() as spill_dir:
+        print("Spilling (user_id, hash) pairs by hash prefix")
+        rows = spill_partitions(csv_path, spill_dir, partitions)
+
+        print("Checking partitions")
+        for name in sorted(os.listdir(spill_dir)):
+            partition_users, partition_hashes, partition_collisions = check_partition(os.path.join(spill_dir, name))
+            users += partition_users
+            hashes += partition_hashes
+            if partition_collisions.height > 0:
+                collisions.append(partition_collisions)
+
+    collisions = pl.concat(collisions) if collisions else pl.DataFrame(
+        schema={"hash": pl.UInt64, "user_ids": pl.List(pl.String)})
+    return rows, users, hashes, collisions
+
+
+if __name__ == "__main__":
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else CSV_PATH
+    partitions = int(sys.argv[2]) if len(sys.argv) > 2 else PARTITIONS
+
+    start_time = time.perf_counter_ns()
+    rows, users, hashes, collisions = verify(csv_path, partitions)
+    end_time = time.perf_counter_ns()
+
+    print(f"Rows: {rows}")
+    print(f"Unique user IDs: {users}")
+    print(f"Unique hashed user IDs: {hashes}")
+    if collisions.height == 0:
+        print("No collisions: every user_id keeps its own hash")
+    else:
+        print(f"{collisions.height} colliding hashes:")
+        with pl.Config(tbl_rows=-1, fmt_str_lengths=100, fmt_table_cell_list_len=-1):
+            print(collisions.explode("user_ids"))
+    print(f"Execution time: {(end_time - start_time) / 1_000_000:.3f} ms")
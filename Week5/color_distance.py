@@ -0,0 +1,98 @@
+import os
+import sys
+import time
+import numpy as np
+import polars as pl
+
+# hex_to_rgb is shared with the color name table next to the Week 4 scripts
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../Week4"))
+from color_names import hex_to_rgb
+
+# Nearest-target color search. r/place only has a few dozen distinct colors, so every
+# distance is computed once per (palette color, target) with NumPy, and the placements
+# get theirs through a join against that small table (a broadcast join in Spark).
+# A metric takes an (n, 3) array of palette RGB values and one target RGB and returns n distances.
+
+
+def euclidean(colors, target):
+    return np.sqrt(((colors - target) ** 2).sum(axis=1))
+
+
+# Euclidean, but only for colors where green is significantly higher than red and blue
+def green_biased(colors, target, min_green_value=50, green_threshold=6):
+    r, g, b = colors[:, 0], colors[:, 1], colors[:, 2]
+    green = (g >= min_green_value) & (g > r + green_threshold) & (g > b + green_threshold)
+    return np.where(green, euclidean(colors, target), np.inf)
+
+
+# sRGB (0-255) to CIE L*a*b* with the D65 white point
+def rgb_to_lab(colors):
+    rgb = np.asarray(colors, dtype=np.float64) / 255
+    linear = np.where(rgb > 0.04045, ((rgb + 0.055) / 1.055) ** 2.4, rgb / 12.92)
+    xyz = linear @ np.array([[0.4124, 0.2126, 0.0193],
+                             [0.3576, 0.7152, 0.1192],
+                             [0.1805, 0.0722, 0.9505]])
+    xyz = xyz / np.array([0.95047, 1.0, 1.08883])
+    f = np.where(xyz > (6 / 29) ** 3, np.cbrt(xyz), xyz / (3 * (6 / 29) ** 2) + 4 / 29)
+    return np.stack([116 * f[..., 1] - 16, 500 * (f[..., 0] - f[..., 1]), 200 * (f[..., 1] - f[..., 2])], axis=-1)
+
+
+# CIE76 delta E: Euclidean distance in L*a*b*
+def delta_e(colors, target):
+    return euclidean(rgb_to_lab(colors), rgb_to_lab(target))
+
+
+METRICS = {"euclidean": euclidean, "green": green_biased, "delta_e": delta_e}
+
+
+# The shared kernel: nearest target and its distance for every palette color
+def distance_table(palette, targets, metric=euclidean):
+    colors = np.array([hex_to_rgb(color) for color in palette], dtype=np.float64)
+    distances = np.stack([metric(colors, np.array(hex_to_rgb(target), dtype=np.float64)) for target in targets])
+    nearest = distances.argmin(axis=0)
+    return pl.DataFrame({
+        "pixel_color": list(palette),
+        "nearest_target": [targets[i] for i in nearest],
+        "color_distance": distances[nearest, np.arange(len(palette))],
+    })
+
+
+# Polars front end: adds nearest_target and color_distance to every placement
+def polars_with_distance(lf, targets, metric=euclidean):
+    lf = lf.with_columns(pl.col("pixel_color").cast(pl.String))
+    palette = lf.select(pl.col("pixel_color").unique()).collect()["pixel_color"].to_list()
+    return lf.join(distance_table(palette, targets, metric).lazy(), on="pixel_color", how="left")
+
+
+# Spark front end: same table, broadcast to every executor instead of a Python UDF per row
+def spark_with_distance(spark, df, targets, metric=euclidean):
+    from pyspark.sql import functions as F
+
+    palette = [row["pixel_color"] for row in df.select("pixel_color").distinct().collect()]
+    table = spark.createDataFrame(distance_table(palette, targets, metric).rows(),
+                                  "pixel_color string, nearest_target string, color_distance double")
+    return df.join(F.broadcast(table), on="pixel_color", how="left")
+
+
+if __name__ == "__main__":
+    # Intended use: python3 color_distance.py [metric: euclidean, green or delta_e] [target hex colors...]
+    metric = sys.argv[1] if len(sys.argv) > 1 else "delta_e"
+    targets = sys.argv[2:] if len(sys.argv) > 2 else ["#154734"]
+
+    if metric not in METRICS:
+        print(f"Error: metric must be one of {', '.join(METRICS)}")
+        sys.exit()
+
+    start_time = time.perf_counter_ns()
+    result = (
+        polars_with_distance(pl.scan_parquet("../Week4/place.parquet"), targets, METRICS[metric])
+        .group_by("pixel_color", "nearest_target")
+        .agg(pl.len().alias("color_count"), pl.col("color_distance").min().alias("min_color_distance"))
+        .sort(["min_color_distance", "color_count"], descending=[False, True])
+        .collect(engine="streaming")
+    )
+    end_time = time.perf_counter_ns()
+
+    with pl.Config(tbl_rows=-1):
+        print(result)
+    print(f"Execution time: {(end_time - start_time) / 1_000_000:.3f} ms")
@@ -0,0 +1,48 @@
+import os
+from pyspark.sql import SparkSession
+from pyspark.sql import functions as F
+
+# Local-mode Spark tuned for one machine, and a reader for the hourly Hive dataset
+# written by ../Week4/create_parquet.py (day=YYYY-MM-DD/hour=H/part-0.parquet)
+HIVE_DIR = '../Week4/place_hive'
+PARQUET_PATH = '../Week4/place.parquet'
+
+
+def get_spark(app_name="place", driver_memory="8g"):
+    cores = os.cpu_count()
+    return (
+        SparkSession.builder
+        .appName(app_name)
+        .master(f"local[{cores}]")
+        .config("spark.driver.memory", driver_memory)
+        # Adaptive execution merges small shuffle partitions and handles skewed joins at runtime
+        .config("spark.sql.adaptive.enabled", "true")
+        .config("spark.sql.adaptive.coalescePartitions.enabled", "true")
+        .config("spark.sql.adaptive.skewJoin.enabled", "true")
+        # The default of 200 shuffle partitions is far too many for one machine
+        .config("spark.sql.shuffle.partitions", str(cores * 2))
+        # Arrow for toPandas / createDataFrame and vectorized Python functions
+        .config("spark.sql.execution.arrow.pyspark.enabled", "true")
+        .config("spark.sql.files.maxPartitionBytes", "128m")
+        .config("spark.sql.parquet.filterPushdown", "true")
+        .getOrCreate()
+    )
+
+
+# Placements, optionally only start <= timestamp <= end. The day/hour predicate only uses the
+# partition columns, so Spark lists and reads just those hours. Cached, since scripts reuse it.
+def read_placements(spark, start=None, end=None, hive_dir=HIVE_DIR, parquet_path=PARQUET_PATH):
+    if not os.path.isdir(hive_dir):
+        df = spark.read.parquet(parquet_path)
+        if start is not None:
+            df = df.filter(F.col("timestamp").between(start, end))
+        return df.cache()
+
+    df = spark.read.parquet(hive_dir)
+    if start is not None:
+        after_start = (F.col("day") > F.lit(start.date())) | (
+            (F.col("day") == F.lit(start.date())) & (F.col("hour") >= start.hour))
+        before_end = (F.col("day") < F.lit(end.date())) | (
+            (F.col("day") == F.lit(end.date())) & (F.col("hour") <= end.hour))
+        df = df.filter(after_start & before_end).filter(F.col("timestamp").between(start, end))
+    return df.drop("day", "hour").cache()